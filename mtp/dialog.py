@@ -5,7 +5,7 @@ Author:  Heribert Füchtenhans
 
 Version: 2025.3.6
 
-Python: 
+Python:
     tkinter
     mtp_access
 
@@ -21,15 +21,19 @@ Examples:
     >>> adir = dialog.AskDirectory(root, "Test ask_directory", ("Alls well", "Don't do it"))
 """
 
+from concurrent.futures import BrokenExecutor, Future, ThreadPoolExecutor
 import contextlib
 from dataclasses import dataclass
+import json
+import os
 import platform
+import threading
 import tkinter
 import tkinter.simpledialog
 from tkinter import ttk
 from typing import Any, Dict, Optional
 
-if platform.system() == "windows":
+if platform.system() == "Windows":
     from . import win_access as access
 else:
     from . import linux_access as access
@@ -55,10 +59,63 @@ CvmQ4YKICkT6KDRiwYNdDD/2YExSwq6HDTvyYHySgsMJEw1y4FF4ZQKBBAsAwLCjsAwJBQcMCOCx
 OCEcIDN0FImiRm7CP2vMkPHyBQ2ctAP71HHTBs4e2AIDAgA7
 """
 
+# Content types shown in the tree
+DIRECTORY_TYPES = frozenset((access.WPD_CONTENT_TYPE_STORAGE, access.WPD_CONTENT_TYPE_DIRECTORY))
+
 # ------------------------------------------------------------------------------------------------
+# Persistent cache of the directory tree, so the dialog can show known directories at once.
+# Layout: {device key: {directory path: [(child name, child path), ...]}}
+
+TreeCache = Dict[str, Dict[str, list[tuple[str, str]]]]
+
+TREE_CACHE_MAX_DEVICES = 20
+
+# Milliseconds between the checks whether the prefetches of cached listings have finished
+TREE_CACHE_CHECK_INTERVAL = 200
+
+
+def _tree_cache_filename() -> str:
+    """Returns the name of the file the directory tree cache is stored in"""
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mtp", "dialog_tree.json")
+
+
+def _load_tree_cache() -> TreeCache:
+    """Loads the directory tree cache, an empty cache is returned if it can't be read"""
+    try:
+        with open(_tree_cache_filename(), encoding="utf-8") as inp:
+            data = json.load(inp)
+        return {
+            str(key): {
+                str(path): [(str(name), str(child_path)) for name, child_path in listing]
+                for path, listing in device_cache.items()
+            }
+            for key, device_cache in data.items()
+        }
+    except Exception:  # pylint: disable=broad-exception-caught
+        return {}
 
 
-@dataclass
+def _save_tree_cache(cache: TreeCache) -> None:
+    """Saves the directory tree cache, keeping only the last used devices"""
+    for key in list(cache)[:-TREE_CACHE_MAX_DEVICES]:
+        del cache[key]
+    filename = _tree_cache_filename()
+    with contextlib.suppress(OSError):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Replace the file at once, so an interrupted write can't leave a broken cache
+        with open(filename + ".tmp", "w", encoding="utf-8") as outp:
+            json.dump(cache, outp)
+        os.replace(filename + ".tmp", filename)
+
+
+# ------------------------------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
 class TreeEntry:
     """Class for keepeing the entries in the tree"""
 
@@ -66,6 +123,8 @@ class TreeEntry:
     content: access.PortableDeviceContent | None
     child_treeids: list[str]
     content_loaded: bool
+    children: Optional[list[access.PortableDeviceContent]] = None
+    path: str = ""
 
 
 class AskDirectory(tkinter.simpledialog.Dialog):  # pylint: disable=too-many-instance-attributes
@@ -81,6 +140,9 @@ class AskDirectory(tkinter.simpledialog.Dialog):  # pylint: disable=too-many-ins
         comtypes.COMError: exceptions if something went wrong
     """
 
+    # The smartphone icon, shared by all dialogs of one Tk interpreter
+    _icon: Optional[tkinter.PhotoImage] = None
+
     def __init__(
         self,
         parent: tkinter.Tk,
@@ -98,16 +160,40 @@ class AskDirectory(tkinter.simpledialog.Dialog):  # pylint: disable=too-many-ins
         self._parent = parent
         self._dialog_title = title
         self._tree: ttk.Treeview
-        self._smartphone_icon = tkinter.PhotoImage(data=SMARTPHONE_ICON)
+        self._smartphone_icon = type(self)._get_icon(parent)
         self._devicelist: dict[str, access.PortableDevice] = {}
         self._buttons = buttons
         self._tree_entries: Dict[str, TreeEntry] = {}
+        self._tree_cache = _load_tree_cache()
+        # Read the children of freshly inserted entries in the background, one pool per device
+        # path. Their threads have their own connection to the device, see access.init_thread.
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._prefetches: Dict[str, Future[Optional[list[access.PortableDeviceContent]]]] = {}
+        # Entries showing a cached listing, it's checked when their prefetch has finished
+        self._unverified: set[str] = set()
+        self._check_id: Optional[str] = None
+        # Set when the dialog closes, running prefetches stop reading then
+        self._closing = threading.Event()
         # external variables
         self.answer = ""
         self.wpd_device: Optional[access.PortableDevice] = None
-        tkinter.simpledialog.Dialog.__init__(self, parent, title=title)
+        try:
+            tkinter.simpledialog.Dialog.__init__(self, parent, title=title)
+        finally:
+            self._closing.set()
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._store_prefetches()
+            _save_tree_cache(self._tree_cache)
         self.update_idletasks()
 
+    @classmethod
+    def _get_icon(cls, parent: tkinter.Misc) -> tkinter.PhotoImage:
+        """Returns the smartphone icon, it's only created once per Tk interpreter"""
+        if cls._icon is None or cls._icon.tk is not parent.tk:
+            cls._icon = tkinter.PhotoImage(master=parent, data=SMARTPHONE_ICON)
+        return cls._icon
+
     def buttonbox(self) -> None:
         """Create own buttons"""
         box = ttk.Frame(self)
@@ -127,11 +213,16 @@ class AskDirectory(tkinter.simpledialog.Dialog):  # pylint: disable=too-many-ins
         self._tree.column("#0", width=500)
         self._tree.bind("<<TreeviewOpen>>", self._on_treeselect)
         # adding data, get devices
+        self.config(cursor="watch")
+        self.update_idletasks()
         for dev in access.get_portable_devices():
             if device_desc := dev.get_description():
                 name = device_desc[0]
                 devpath = dev.get_device_path()
                 self._devicelist[devpath] = dev
+                self._pools[devpath] = ThreadPoolExecutor(
+                    max_workers=2, initializer=access.init_thread, initargs=(dev,)
+                )
                 treeid = self._tree.insert(
                     "",
                     tkinter.END,
@@ -140,69 +231,264 @@ class AskDirectory(tkinter.simpledialog.Dialog):  # pylint: disable=too-many-ins
                     image=self._smartphone_icon,
                 )
                 self._tree_entries[treeid] = TreeEntry(dev, None, [], False)
-                self.config(cursor="watch")
-                self.update_idletasks()
                 self._process_directory(treeid)
-                self.config(cursor="")
+        self.config(cursor="")
         # place the Treeview widget on the root window
         self._tree.pack(side=tkinter.TOP, fill=tkinter.BOTH, expand=True)
 
+    def _device_cache(self, dev: access.PortableDevice) -> Dict[str, list[tuple[str, str]]]:
+        """Returns the directory tree cache of a device and marks it as last used"""
+        key = f"{dev.get_device_path()}|{dev.get_description()[1]}"
+        device_cache = self._tree_cache.pop(key, {})
+        self._tree_cache[key] = device_cache
+        return device_cache
+
     def _process_directory(self, insert_after_id: str) -> None:
-        """Insert directory listing until depth is 0"""
+        """Insert the directory listing of an entry"""
         treeentry = self._tree_entries[insert_after_id]
-        if treeentry.content is not None:
-            cont = list(treeentry.content.get_children())
-        else:
-            cont = list(treeentry.dev.get_content())
-        if len(cont) == 0:  # no children
+        if treeentry.content_loaded:
             return
-        for child in cont:
-            contenttype = child.content_type
-            if contenttype not in (
-                access.WPD_CONTENT_TYPE_STORAGE,
-                access.WPD_CONTENT_TYPE_DIRECTORY,
-            ):
+        device_cache = self._device_cache(treeentry.dev)
+        cached = device_cache.get(treeentry.path)
+        future = self._prefetches.pop(insert_after_id, None)
+        if (
+            cached is not None
+            and future is None
+            and (future := self._submit_read(treeentry)) is None
+        ):
+            # Without a prefetch the cached listing can't be checked, so it isn't used
+            cached = None
+        if treeentry.children is None and future is not None and (future.done() or cached is None):
+            treeentry.children = self._prefetch_result(treeentry, future)
+        if treeentry.children is None and cached is None:
+            treeentry.children = self._read_children(treeentry) or []
+        listing: list[tuple[str, str, Optional[access.PortableDeviceContent]]] = []
+        if treeentry.children is not None:
+            listing = [(child.name, child.full_filename, child) for child in treeentry.children]
+            device_cache[treeentry.path] = [(name, path) for name, path, _ in listing]
+        elif future is not None:
+            # Show the cached directories at once, they are compared with the directories on
+            # the device when the prefetch has finished
+            listing = [(name, path, None) for name, path in cached or []]
+            self._prefetches[insert_after_id] = future
+            self._unverified.add(insert_after_id)
+            self._schedule_check()
+        self._insert_children(insert_after_id, listing)
+        treeentry.content_loaded = True
+
+    def _insert_children(
+        self,
+        insert_after_id: str,
+        listing: list[tuple[str, str, Optional[access.PortableDeviceContent]]],
+    ) -> None:
+        """Appends an entry for each (name, path, content) of listing to the children of an entry
+        and starts reading their children in the background"""
+        if len(listing) == 0:  # no children
+            return
+        treeentry = self._tree_entries[insert_after_id]
+        # Detach the entry while filling it, so Tk has to redraw it only once
+        with contextlib.suppress(tkinter.TclError):
+            parent_id = self._tree.parent(insert_after_id)
+            index = self._tree.index(insert_after_id)
+            self._tree.detach(insert_after_id)
+            # local names for the loop, it runs once per directory
+            insert, end = self._tree.insert, tkinter.END
+            tree_entries, prefetches, submit_read = (
+                self._tree_entries,
+                self._prefetches,
+                self._submit_read,
+            )
+            dev, child_treeids = treeentry.dev, treeentry.child_treeids
+            try:
+                for name, path, child in listing:
+                    treeid = insert(insert_after_id, end, text=name, open=False)
+                    tree_entries[treeid] = child_entry = TreeEntry(dev, child, [], False, path=path)
+                    child_treeids.append(treeid)
+                    if (future := submit_read(child_entry)) is not None:
+                        prefetches[treeid] = future
+            finally:
+                self._tree.move(insert_after_id, parent_id, index)
+
+    def _submit_read(
+        self, treeentry: TreeEntry
+    ) -> Optional[Future[Optional[list[access.PortableDeviceContent]]]]:
+        """Starts reading the children of an entry in the background. Returns None if the
+        threads couldn't open the device."""
+        try:
+            return self._pools[treeentry.dev.get_device_path()].submit(
+                self._read_children, treeentry
+            )
+        except BrokenExecutor:
+            return None
+
+    @staticmethod
+    def _prefetch_result(
+        treeentry: TreeEntry, future: Future[Optional[list[access.PortableDeviceContent]]]
+    ) -> Optional[list[access.PortableDeviceContent]]:
+        """Returns the children read by a finished prefetch, moved into the Tk thread. Returns
+        None if the prefetch failed."""
+        try:
+            children = future.result()
+        except Exception:  # pylint: disable=broad-exception-caught
+            return None
+        # Read over the connection of the prefetch thread. None: the directory doesn't exist.
+        return [access.bind_to_thread(treeentry.dev, child) for child in children or []]
+
+    def _schedule_check(self) -> None:
+        """Checks the cached listings again after TREE_CACHE_CHECK_INTERVAL"""
+        if self._check_id is None and self._unverified:
+            self._check_id = self.after(TREE_CACHE_CHECK_INTERVAL, self._check_cached_listings)
+
+    def _check_cached_listings(self) -> None:
+        """Called by Tk, replaces the cached listings whose prefetches have finished"""
+        self._check_id = None
+        for treeid in [treeid for treeid in self._unverified if self._prefetches[treeid].done()]:
+            if treeid in self._unverified:  # not removed with a parent entry
+                self._verify_listing(treeid)
+        self._schedule_check()
+
+    def _verify_listing(self, treeid: str) -> None:
+        """Replaces the cached listing of an entry with the directories on the device. Waits
+        for the prefetch of the entry if it hasn't finished."""
+        self._unverified.discard(treeid)
+        treeentry = self._tree_entries[treeid]
+        children = self._prefetch_result(treeentry, self._prefetches.pop(treeid))
+        if children is None:
+            children = self._read_children(treeentry) or []
+        treeentry.children = children
+        self._device_cache(treeentry.dev)[treeentry.path] = [
+            (child.name, child.full_filename) for child in children
+        ]
+        paths = [child.full_filename for child in children]
+        shown = {self._tree_entries[c_id].path: c_id for c_id in treeentry.child_treeids}
+        if list(shown) != paths:
+            # Remove the directories that are gone and add the new ones
+            for path, c_id in shown.items():
+                if path not in paths:
+                    self._remove_entry(c_id)
+            treeentry.child_treeids = [
+                c_id for c_id in treeentry.child_treeids if c_id in self._tree_entries
+            ]
+            self._insert_children(
+                treeid,
+                [
+                    (child.name, child.full_filename, child)
+                    for child in children
+                    if child.full_filename not in shown
+                ],
+            )
+            shown = {self._tree_entries[c_id].path: c_id for c_id in treeentry.child_treeids}
+            treeentry.child_treeids = [shown[path] for path in paths]
+            for index, c_id in enumerate(treeentry.child_treeids):
+                self._tree.move(c_id, treeid, index)
+        # The entries of the cache have no content yet
+        for child in children:
+            self._tree_entries[shown[child.full_filename]].content = child
+
+    def _remove_entry(self, treeid: str) -> None:
+        """Removes an entry and all entries below it from the tree"""
+        treeentry = self._tree_entries.pop(treeid)
+        for c_id in treeentry.child_treeids:
+            self._remove_entry(c_id)
+        if (future := self._prefetches.pop(treeid, None)) is not None:
+            future.cancel()
+        self._unverified.discard(treeid)
+        with contextlib.suppress(tkinter.TclError):
+            self._tree.delete(treeid)
+
+    def _read_children(self, treeentry: TreeEntry) -> Optional[list[access.PortableDeviceContent]]:
+        """Read the children of an entry. Runs in the worker threads too, so no tkinter calls here.
+        The children use the device connection of the calling thread. Returns None if the entry
+        was taken from the cache and can't be found on the device or if the dialog was closed
+        while reading."""
+        # The contents of the tree entries belong to the Tk thread
+        if treeentry.content is not None:
+            content = access.bind_to_thread(treeentry.dev, treeentry.content)
+        elif not treeentry.path:
+            # Only storages and directories, like the children of all other entries
+            return [
+                child
+                for child in treeentry.dev.get_content()
+                if child.content_type in DIRECTORY_TYPES
+            ]
+        elif (
+            content := access.get_content_from_device_path(treeentry.dev, treeentry.path)
+        ) is None:
+            return None
+        children = []
+        for child in content.get_children(content_types=DIRECTORY_TYPES):
+            if self._closing.is_set():
+                return None
+            children.append(child)
+        return children
+
+    def _store_prefetches(self) -> None:
+        """Put the results of all finished prefetches into the directory tree cache"""
+        for treeid, future in self._prefetches.items():
+            if not future.done() or future.cancelled() or future.exception() is not None:
                 continue
-            with contextlib.suppress(tkinter.TclError):
-                treeid = self._tree.insert(
-                    insert_after_id,
-                    tkinter.END,
-                    text=child.name,
-                    open=False,
-                )
-                self._tree_entries[treeid] = TreeEntry(treeentry.dev, child, [], False)
-                treeentry.child_treeids.append(treeid)
-        self._tree_entries[insert_after_id].content_loaded = True
+            if (children := future.result()) is None:
+                continue
+            treeentry = self._tree_entries[treeid]
+            self._device_cache(treeentry.dev)[treeentry.path] = [
+                (child.name, child.full_filename) for child in children
+            ]
 
     def _on_treeselect(self, _: Any) -> None:
         """Will be called on very selection"""
         treeid = self._tree.focus()
         status = self._tree.item(treeid, "open")
         if not status:
-            self.config(cursor="watch")
-            self.update_idletasks()
-            for c_id in self._tree_entries[treeid].child_treeids:
-                if not self._tree_entries[c_id].content_loaded:
-                    self._process_directory(c_id)
-            self.config(cursor="")
+            child_treeids = self._tree_entries[treeid].child_treeids
+            if not all(self._tree_entries[c_id].content_loaded for c_id in child_treeids):
+                self.config(cursor="watch")
+                self.update_idletasks()
+                for c_id in child_treeids:
+                    if not self._tree_entries[c_id].content_loaded:
+                        self._process_directory(c_id)
+                self.config(cursor="")
             self._tree.item(treeid, open=True)
         else:
             self._tree.item(treeid, open=False)
 
+    def destroy(self) -> None:
+        """Stops checking the cached listings before the dialog is destroyed"""
+        if self._check_id is not None:
+            self.after_cancel(self._check_id)
+            self._check_id = None
+        super().destroy()
+
     def _on_ok(self) -> None:
         """OK Button"""
+        treeid = self._tree.focus()
+        # A directory shown from the cache may be gone, check the listings it was taken from
+        ancestors = []
+        parent_id = treeid
+        while parent_id:
+            parent_id = self._tree.parent(parent_id)
+            ancestors.append(parent_id)
+        if unverified := [
+            parent_id for parent_id in reversed(ancestors) if parent_id in self._unverified
+        ]:
+            self.config(cursor="watch")
+            self.update_idletasks()
+            for parent_id in unverified:
+                if parent_id in self._unverified:
+                    self._verify_listing(parent_id)
+            self.config(cursor="")
+            if treeid not in self._tree_entries:
+                return
         self.withdraw()
         self.update_idletasks()
-        treeid = self._tree.focus()
         if treeid == "":
             self.cancel()
         else:
-            cont = self._tree_entries[treeid].content
-            if cont is None:
+            treeentry = self._tree_entries[treeid]
+            if not treeentry.path:
                 self.cancel()
                 return
-            self.answer = cont.full_filename
-            self.wpd_device = self._tree_entries[treeid].dev
+            self.answer = treeentry.path
+            self.wpd_device = treeentry.dev
             try:
                 self.apply()
             finally:
@@ -18,6 +18,8 @@ The module contains the following functions:
 
 - 'get_portable_devices' Get all attached portable devices.
 - 'get_content_from_device_path' - Get the content of a path.
+- 'init_thread' - Prepares a thread of the application for reading a device.
+- 'bind_to_thread' - Moves a content read in another thread into the calling thread.
 - 'walk' - Iterates ower all files in a tree.
 - 'makedirs' - Creates the directories on the MTP device if they don't exist.
 
@@ -63,11 +65,20 @@ Examples:
 
 # pylint: disable=global-statement
 
+from collections import OrderedDict, deque
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextlib
 import datetime
+import functools
+from itertools import islice
+from operator import attrgetter
 import os
 import shutil
-from typing import IO, Generator, List, Optional, Tuple
+import stat
+import threading
+import time
+from typing import IO, Collection, Generator, Iterator, List, Optional, Tuple, Union
 
 # Constants for the type entries returned bei PortableDeviceContent.get_properties
 WPD_CONTENT_TYPE_UNDEFINED = -1
@@ -80,6 +91,147 @@ WPD_CONTENT_TYPE_DEVICE = 3
 WPD_DELETE_NO_RECURSION = 0
 WPD_DELETE_WITH_RECURSION = 1
 
+# Maximum number of entries in the stat cache and the seconds an entry is valid
+STAT_CACHE_SIZE = 4096
+STAT_CACHE_TTL = 2.0
+
+# Number of converted modification times that are kept
+DATE_CACHE_SIZE = 1024
+
+# Buffer size for copying streams that are no real files
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Number of threads and how many queued directories walk lists in advance
+WALK_THREADS = 8
+WALK_PREFETCH = 16
+
+# Flags to open a directory whose entries are read with os.scandir(fd)
+_DIR_OPEN_FLAGS = os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC
+
+# On linux we can take a look into the directory where gvfs mounts the devices
+_GVFS_SEARCH_PATH = f"/run/user/{os.getuid()}/gvfs"
+
+
+# -------------------------------------------------------------------------------------------------
+# Stat cache. Each stat on a gvfs mount is a round trip over USB, so paths that are looked up
+# again (get_path, get_child, ...) are answered from here. Changes done through this module
+# invalidate the cached entries. Others, e.g. by the phone itself, are seen after STAT_CACHE_TTL.
+
+_stat_cache: "OrderedDict[bytes, tuple[float, os.stat_result]]" = OrderedDict()
+_stat_cache_lock = threading.Lock()
+
+
+def _cached_stat(path: Union[str, bytes]) -> os.stat_result:
+    """os.stat with a LRU cache whose entries expire after STAT_CACHE_TTL seconds.
+    Raises OSError like os.stat if the path doesn't exist."""
+    key = os.fsencode(path)
+    now = time.monotonic()
+    with _stat_cache_lock:
+        if (cached := _stat_cache.get(key)) is not None:
+            if now - cached[0] < STAT_CACHE_TTL:
+                _stat_cache.move_to_end(key)
+                return cached[1]
+            del _stat_cache[key]
+    st = os.stat(key)
+    with _stat_cache_lock:
+        _stat_cache[key] = (now, st)
+        if len(_stat_cache) > STAT_CACHE_SIZE:
+            _stat_cache.popitem(last=False)
+    return st
+
+
+def _invalidate_stat_cache(path: Union[str, bytes]) -> None:
+    """Removes path and everything below it from the stat cache"""
+    key = os.fsencode(path)
+    prefix = key + os.fsencode(os.sep)
+    with _stat_cache_lock:
+        _stat_cache.pop(key, None)
+        for cached in [cached for cached in _stat_cache if cached.startswith(prefix)]:
+            del _stat_cache[cached]
+
+
+class _scandir_at:  # pylint: disable=invalid-name
+    """os.scandir on an open file descriptor of the directory. The stat calls of the entries
+    are then done with fstatat relative to that descriptor, so the kernel (and gvfs) only has to
+    resolve the entry name and not the whole path again.
+    The directory is opened at once, so errors are raised before the with statement.
+    closed is True once the descriptor is closed, the entries can't stat anymore then."""
+
+    def __init__(self, path: bytes) -> None:
+        self.closed = False
+        self._dir_fd = os.open(path, _DIR_OPEN_FLAGS)
+        try:
+            self._entries = os.scandir(self._dir_fd)
+        except OSError:
+            os.close(self._dir_fd)
+            raise
+
+    def __enter__(self) -> Iterator["os.DirEntry[str]"]:
+        return self._entries
+
+    def __exit__(self, *_: object) -> None:
+        self.closed = True
+        self._entries.close()
+        os.close(self._dir_fd)
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _mtime_to_datetime(mtime: float) -> datetime.datetime:
+    """datetime.fromtimestamp with a cache. Files copied together to a device often share the
+    same modification time and datetime instances are immutable, so they can be shared."""
+    return datetime.datetime.fromtimestamp(mtime)
+
+
+# -------------------------------------------------------------------------------------------------
+# Copy functions
+
+
+def _copy_stream(inp: IO[bytes], outp: IO[bytes]) -> None:
+    """Copies the rest of inp to outp. If both are real files the data is copied by the kernel
+    with os.sendfile, otherwise through a buffer of COPY_BUFFER_SIZE bytes."""
+    try:
+        in_fd, out_fd = inp.fileno(), outp.fileno()
+        start = offset = inp.tell()
+        st = os.fstat(in_fd)
+        outp.flush()
+    except (AttributeError, OSError, ValueError):
+        shutil.copyfileobj(inp, outp, COPY_BUFFER_SIZE)
+        return
+    size = st.st_size
+    if not stat.S_ISREG(st.st_mode) or size == 0:
+        # The size is only reliable for regular files, procfs files or devices report 0
+        shutil.copyfileobj(inp, outp, COPY_BUFFER_SIZE)
+        return
+    try:
+        while offset < size:
+            sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    except OSError:
+        if offset != start:
+            raise
+        # sendfile isn't supported for this kind of files
+        shutil.copyfileobj(inp, outp, COPY_BUFFER_SIZE)
+        return
+    # sendfile used the file descriptors directly, so bring the file objects up to date
+    inp.seek(offset)
+    with contextlib.suppress(OSError):
+        outp.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+
+
+def _copy_file(src: Union[str, bytes], dst: Union[str, bytes]) -> None:
+    """Copies the file src to dst and keeps the permission bits and the modification time if the
+    filesystem allows it, like shutil.copy2 without the extended attributes"""
+    with open(src, "rb") as inp, open(dst, "wb") as outp:
+        _copy_stream(inp, outp)
+        st = os.fstat(inp.fileno())
+    # What shutil.copymode does, but with the stat result we already have
+    with contextlib.suppress(OSError):
+        os.chmod(dst, stat.S_IMODE(st.st_mode))
+    with contextlib.suppress(OSError):
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
 
 # -------------------------------------------------------------------------------------------------
 class PortableDevice:
@@ -97,6 +249,8 @@ class PortableDevice:
         IOError: If something went wrong
     """
 
+    __slots__ = ("_path_to_device", "_desc", "_name", "_description_tuple", "serialnumber")
+
     def __init__(self, path_to_device: str) -> None:
         """Init the class.
 
@@ -104,15 +258,16 @@ class PortableDevice:
             path_to_device: Linux path to the device
         """
         self._path_to_device = path_to_device
-        dirname = path_to_device.split(os.sep)[-1]
         self._desc = "Unknown"
         self._name = "Unknown"
-        if "=" in dirname:
-            devicename = dirname.split("=", 1)[1]
-            if "_" in devicename:
-                self._name = devicename
-                self._desc = devicename.split("_", 0)[0]
-                self.serialnumber = devicename.split("_")[-1]
+        self.serialnumber = ""
+        # The directory is named like mtp:host=<vendor>_<model>_<serialnumber>
+        _, equal_sign, devicename = path_to_device.rpartition(os.sep)[2].partition("=")
+        if equal_sign and "_" in devicename:
+            self._name = devicename
+            self._desc = devicename.partition("_")[0]
+            self.serialnumber = devicename.rpartition("_")[2]
+        self._description_tuple = (self._name, self._desc)
 
     def get_description(self) -> Tuple[str, str]:
         """Get the name and the description of the device. If no description is available
@@ -127,12 +282,20 @@ class PortableDevice:
             >>> dev[0].get_description()
             ('Nokia 6', 'Nokia 6')
         """
-        return (self._name, self._desc)
+        return self._description_tuple
 
     def get_device_path(self) -> str:
         """Returns the full path to the directory"""
         return self._path_to_device
 
+    def _has_any_storage(self) -> bool:
+        """Returns True if the device shows at least one storage, without reading the storages"""
+        try:
+            with os.scandir(self._path_to_device) as entries:
+                return next(entries, None) is not None
+        except OSError:
+            return False
+
     def get_content(self) -> List["PortableDeviceContent"]:
         """Get the content of a device. The storages
 
@@ -146,11 +309,15 @@ class PortableDevice:
             '<PortableDeviceContent c_wchar_p('
         """
         ret_objs: list["PortableDeviceContent"] = []
+        fs_path = os.fsencode(self._path_to_device)
         try:
-            for entry in os.listdir(self._path_to_device):
-                ret_objs.append(
-                    PortableDeviceContent(self, os.path.join(self._path_to_device, entry), WPD_CONTENT_TYPE_STORAGE)
-                )
+            with _scandir_at(fs_path) as entries:
+                for entry in entries:
+                    ret_objs.append(
+                        PortableDeviceContent._from_direntry(
+                            self, self._path_to_device, fs_path, entry, WPD_CONTENT_TYPE_STORAGE
+                        )
+                    )
             ret_objs.sort(key=lambda entry: entry.name)
         except OSError as err:
             raise IOError(f"Can't access {self._path_to_device}.") from err
@@ -161,9 +328,12 @@ class PortableDevice:
 
 
 # -------------------------------------------------------------------------------------------------
-class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
+class PortableDeviceContent:
     """Class for one file, directory or storage with it's properties.
-    This class is only internaly created, use it only to read the properties
+    This class is only internaly created, use it only to read the properties.
+    Files are stated on the first access to size or date_created. A file that can't be stated
+    keeps the content type WPD_CONTENT_TYPE_FILE, has the size -1 and the time of the first
+    access as date_created. It is no longer turned into a WPD_CONTENT_TYPE_STORAGE.
 
     Args:
         port_device: Portable device instance.
@@ -191,23 +361,113 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
         comtypes.COMError: If something went wrong
     """
 
-    def __init__(self, port_device: PortableDevice, dirpath: str, typ: int) -> None:
+    # One instance per file during a walk, so no per instance __dict__
+    __slots__ = (
+        "_port_device",
+        "full_filename",
+        "_fs_filename",
+        "name",
+        "content_type",
+        "_st",
+        "_entry",
+        "_date_created",
+    )
+
+    def __init__(
+        self,
+        port_device: PortableDevice,
+        dirpath: str,
+        typ: int,
+        st: Optional[os.stat_result] = None,
+        fs_filename: Optional[bytes] = None,
+    ) -> None:
         """ """
 
         self._port_device = port_device
         self.full_filename = dirpath
         self.name = os.path.basename(dirpath)
         self.content_type = typ
-        self.size = -1
-        self.date_created = datetime.datetime.now()
-        if typ == WPD_CONTENT_TYPE_FILE:
-            try:
-                self.size = os.path.getsize(dirpath)
-                self.date_created = datetime.datetime.fromtimestamp(os.path.getmtime(dirpath))
-            except OSError:
-                self.content_type = WPD_CONTENT_TYPE_STORAGE
-        elif typ == WPD_CONTENT_TYPE_DEVICE:
+        # size and date_created are read from the stat result on first use. Most users of a
+        # walk only look at the names, so the files don't have to be stated at all.
+        self._st = st
+        # The directory entry of a file from get_children and the scan it belongs to, see _file_stat
+        self._entry: Optional[Tuple["os.DirEntry[str]", _scandir_at]] = None
+        self._date_created: Optional[datetime.datetime] = None
+        if typ == WPD_CONTENT_TYPE_DEVICE:
             self.full_filename = port_device.get_device_path()
+            fs_filename = None
+        # The path encoded once for the syscalls, so they don't have to encode the str every time
+        self._fs_filename = (
+            fs_filename if fs_filename is not None else os.fsencode(self.full_filename)
+        )
+
+    @classmethod
+    def _from_direntry(  # pylint: disable=too-many-arguments
+        cls,
+        port_device: PortableDevice,
+        dirpath: str,
+        fs_dirpath: bytes,
+        entry: "os.DirEntry[str]",
+        typ: int,
+        scan: Optional[_scandir_at] = None,
+    ) -> "PortableDeviceContent":
+        """Create an instance from an entry of _scandir_at for the directory dirpath / fs_dirpath.
+        If scan is given, a file is stated through the entry as long as scan is open."""
+        name = entry.name
+        content = cls(
+            port_device,
+            os.path.join(dirpath, name),
+            typ,
+            fs_filename=os.path.join(fs_dirpath, os.fsencode(name)),
+        )
+        if scan is not None and typ == WPD_CONTENT_TYPE_FILE:
+            content._entry = (entry, scan)
+        return content
+
+    @classmethod
+    def _from_path(
+        cls, port_device: PortableDevice, fullname: str
+    ) -> Optional["PortableDeviceContent"]:
+        """Create an instance for an existing file or directory with only one stat call.
+        Returns None if the path doesn't exist."""
+        try:
+            st = _cached_stat(fullname)
+        except OSError:
+            return None
+        typ = WPD_CONTENT_TYPE_DIRECTORY if stat.S_ISDIR(st.st_mode) else WPD_CONTENT_TYPE_FILE
+        return cls(port_device, fullname, typ, st=st)
+
+    def _file_stat(self) -> Optional[os.stat_result]:
+        """Returns the stat result of a file, stating it on the first call.
+        None is returned for all other content types or if the file can't be stated."""
+        if self.content_type != WPD_CONTENT_TYPE_FILE:
+            return None
+        if self._st is None:
+            entry, self._entry = self._entry, None
+            with contextlib.suppress(OSError):
+                if entry is not None and not entry[1].closed:
+                    # The entry keeps the stat result of is_dir on DT_UNKNOWN filesystems,
+                    # otherwise it stats relative to the open directory
+                    self._st = entry[0].stat()
+                else:
+                    self._st = _cached_stat(self._fs_filename)
+        return self._st
+
+    @property
+    def size(self) -> int:
+        """The size of the file in bytes, -1 if the content is no file or can't be stated"""
+        st = self._file_stat()
+        return st.st_size if st is not None else -1
+
+    @property
+    def date_created(self) -> datetime.datetime:
+        """The modification date of the file, for all other contents the time of the first access"""
+        if self._date_created is None:
+            st = self._file_stat()
+            self._date_created = (
+                _mtime_to_datetime(st.st_mtime) if st is not None else datetime.datetime.now()
+            )
+        return self._date_created
 
     def get_properties(
         self,
@@ -245,9 +505,16 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             self._port_device.serialnumber,
         )
 
-    def get_children(self) -> Generator["PortableDeviceContent", None, None]:
+    def get_children(
+        self, content_types: Optional[Collection[int]] = None
+    ) -> Generator["PortableDeviceContent", None, None]:
         """Get the child items of a folder.
 
+        Args:
+            content_types: If given, only children whose content_type is in this collection
+                        are returned, e.g. (WPD_CONTENT_TYPE_STORAGE, WPD_CONTENT_TYPE_DIRECTORY)
+                        to skip all files.
+
         Returns:
             A Generator of PortableDeviceContent instances each representing a child entry.
 
@@ -258,15 +525,22 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> str(cont.get_children()[0])[:58]
             "<PortableDeviceContent s10001: ('Interner Speicher', 0, -1"
         """
-        if not os.path.isdir(self.full_filename):
+        try:
+            scan = _scandir_at(self._fs_filename)
+        except OSError:
             return
-        for entry in os.listdir(self.full_filename):
-            full_name = os.path.join(self.full_filename, entry)
-            yield PortableDeviceContent(
-                self._port_device,
-                full_name,
-                (WPD_CONTENT_TYPE_DIRECTORY if os.path.isdir(full_name) else WPD_CONTENT_TYPE_FILE),
-            )
+        dirpath, fs_dirpath = self.full_filename, self._fs_filename
+        with scan as entries:
+            for entry in entries:
+                # is_dir uses the d_type readdir delivered. Only if the filesystem reports
+                # DT_UNKNOWN or a symlink it stats. That result is cached in the entry and
+                # _file_stat reuses it while the scan is open, so files cost at most one stat.
+                typ = WPD_CONTENT_TYPE_DIRECTORY if entry.is_dir() else WPD_CONTENT_TYPE_FILE
+                if content_types is not None and typ not in content_types:
+                    continue
+                yield PortableDeviceContent._from_direntry(
+                    self._port_device, dirpath, fs_dirpath, entry, typ, scan
+                )
 
     def get_child(self, name: str) -> Optional["PortableDeviceContent"]:
         """Returns a PortableDeviceContent for one child whos name is known.
@@ -286,13 +560,8 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> str(cont.get_child("Interner Speicher"))[:58]
             "<PortableDeviceContent s10001: ('Interner Speicher', 0, -1"
         """
-        fullname = os.path.join(self.full_filename, name)
-        if not os.path.exists(fullname):
-            return None
-        return PortableDeviceContent(
-            self._port_device,
-            fullname,
-            (WPD_CONTENT_TYPE_DIRECTORY if os.path.isdir(fullname) else WPD_CONTENT_TYPE_FILE),
+        return PortableDeviceContent._from_path(
+            self._port_device, os.path.join(self.full_filename, name)
         )
 
     def get_path(self, name: str) -> Optional["PortableDeviceContent"]:
@@ -313,13 +582,7 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> str(cont.get_path("Interner Speicher\\Android\\data"))[:41]
             "<PortableDeviceContent oE: ('data', 1, -1"
         """
-        if not os.path.exists(name):
-            return None
-        return PortableDeviceContent(
-            self._port_device,
-            name,
-            (WPD_CONTENT_TYPE_DIRECTORY if os.path.isdir(name) else WPD_CONTENT_TYPE_FILE),
-        )
+        return PortableDeviceContent._from_path(self._port_device, name)
 
     def __repr__(self) -> str:
         """ """
@@ -341,6 +604,7 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> cont.create_content("MyMusic")
         """
         fullname = os.path.join(self.full_filename, dirname)
+        _invalidate_stat_cache(fullname)
         if os.path.exists(fullname):
             raise IOError(f"Directory '{fullname}' allready exists")
         os.mkdir(fullname)
@@ -366,8 +630,10 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> cont.upload_stream("Test.mp3", inp, size)
             >>> inp.close()
         """
-        with open(filename, "rb") as outp:
-            shutil.copyfileobj(inputstream, outp)
+        filename = os.path.join(self.full_filename, filename)
+        _invalidate_stat_cache(filename)
+        with open(filename, "wb") as outp:
+            _copy_stream(inputstream, outp)
 
     def upload_file(self, filename: str, inputfilename: str) -> None:
         """Upload of a file to MTP device.
@@ -386,7 +652,9 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> name = '..\\..\\Tests\\OnFire.mp3'
             >>> cont.upload_file("Test.mp3", name)
         """
-        shutil.copy2(inputfilename, filename)
+        filename = os.path.join(self.full_filename, filename)
+        _invalidate_stat_cache(filename)
+        _copy_file(inputfilename, filename)
 
     def download_stream(self, outputstream: IO[bytes]) -> None:
         """Download a file from MTP device.
@@ -406,8 +674,8 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> cont.download_stream(outp)
             >>> outp.close()
         """
-        with open(self.full_filename, "rb") as inp:
-            shutil.copyfileobj(inp, outputstream)
+        with open(self._fs_filename, "rb") as inp:
+            _copy_stream(inp, outputstream)
 
     def download_file(self, outputfilename: str) -> None:
         """Download of a file from MTP device
@@ -425,7 +693,7 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> name = '..\\..\\Tests\\hangouts_incoming_call.ogg'
             >>> cont.download_file(name)
         """
-        shutil.copy2(self.full_filename, outputfilename)
+        _copy_file(self._fs_filename, outputfilename)
 
     def remove(self) -> None:
         """Deletes the current directory or file.
@@ -447,10 +715,11 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> mycont.remove()
             0
         """
+        _invalidate_stat_cache(self._fs_filename)
         if self.content_type == WPD_CONTENT_TYPE_FILE:
-            os.remove(self.full_filename)
+            os.remove(self._fs_filename)
         else:
-            shutil.rmtree(self.full_filename)
+            shutil.rmtree(self._fs_filename)
 
 
 # -------------------------------------------------------------------------------------------------
@@ -475,21 +744,45 @@ def get_portable_devices() -> list[PortableDevice]:
         >>> mtp.linux_access.get_portable_devices()
         [<PortableDevice: ('HSG1316', 'HSG1316')>]
     """
-    # On linux we can take a look into a directory
-    # /run/user/1000/gvfs/
-    search_path = f"/run/user/{os.getuid()}/gvfs"
-    if not os.path.exists(search_path):
-        raise IOError(f"Der Suchpfad für Geräte '{search_path}' wurde nicht gefunden.")
+    if not os.path.exists(_GVFS_SEARCH_PATH):
+        raise IOError(f"Der Suchpfad für Geräte '{_GVFS_SEARCH_PATH}' wurde nicht gefunden.")
     devices: List[PortableDevice] = []
-    for entry in os.scandir(search_path):
+    for entry in os.scandir(_GVFS_SEARCH_PATH):
         dev = PortableDevice(entry.path)
         # Device is not ready if we don't get a content
-        if len(dev.get_content()) != 0:
+        if dev._has_any_storage():  # pylint: disable=protected-access
             devices.append(dev)
     return devices
 
 
-def get_content_from_device_path(dev: PortableDevice, fpath: str) -> PortableDeviceContent:
+def init_thread(dev: PortableDevice) -> None:  # pylint: disable=unused-argument
+    """Prepares a thread of the application for reading dev. On Linux the files can be read
+    from every thread, so there is nothing to do. Exists for compatibility with win_access.
+
+    Args:
+        dev: The device the thread will read
+    """
+
+
+def bind_to_thread(
+    dev: PortableDevice, content: PortableDeviceContent  # pylint: disable=unused-argument
+) -> PortableDeviceContent:
+    """Returns content, that was read in another thread, for use in the calling thread. On Linux
+    content can be used in every thread as it is. Exists for compatibility with win_access.
+
+    Args:
+        dev: The device content belongs to
+        content: The content to move
+
+    Returns:
+        content
+    """
+    return content
+
+
+def get_content_from_device_path(
+    dev: PortableDevice, fpath: str
+) -> Optional[PortableDeviceContent]:
     """Get the content of a path.
 
     Args:
@@ -513,16 +806,9 @@ def get_content_from_device_path(dev: PortableDevice, fpath: str) -> PortableDev
     """
     name, _ = dev.get_description()
     if fpath == name:
-        content_type = WPD_CONTENT_TYPE_DEVICE
-    elif os.path.isdir(fpath):
-        content_type = WPD_CONTENT_TYPE_DIRECTORY
-    else:
-        content_type = WPD_CONTENT_TYPE_FILE
-    return PortableDeviceContent(
-        dev,
-        fpath,
-        content_type,
-    )
+        return PortableDeviceContent(dev, fpath, WPD_CONTENT_TYPE_DEVICE)
+    # The same stat and classification as get_child and get_path
+    return PortableDeviceContent._from_path(dev, fpath)  # pylint: disable=protected-access
 
 
 def walk(
@@ -573,37 +859,42 @@ def walk(
     path = path.replace(dev_name, dev.get_device_path(), 1)
     if not (cont := get_content_from_device_path(dev, path)):
         return
-    cont.full_filename = path
-    walk_cont: list[PortableDeviceContent] = [cont]
-    while walk_cont:
-        cont = walk_cont[0]
-        del walk_cont[0]
-        directories: list[PortableDeviceContent] = []
-        files: list[PortableDeviceContent] = []
-        try:
-            for child in cont.get_children():
-                (_, contenttype, _, _, _, _, _) = child.get_properties()
-                if contenttype in [
-                    WPD_CONTENT_TYPE_STORAGE,
-                    WPD_CONTENT_TYPE_DIRECTORY,
-                ]:
-                    directories.append(child)
-                elif contenttype == WPD_CONTENT_TYPE_FILE:
-                    files.append(child)
-                if callback and not callback(child.full_filename):
-                    directories = []
-                    files = []
-                    return
-            yield cont.full_filename, sorted(directories, key=lambda ent: ent.full_filename), sorted(
-                files, key=lambda ent: ent.full_filename
-            )
-        except Exception as err:
-            if error_callback is not None:
-                if not error_callback(str(err)):
-                    directories = []
-                    files = []
+    sort_key = attrgetter("full_filename")
+    walk_cont: deque[PortableDeviceContent] = deque([cont])
+    # The next directories in the queue are listed in the background, so the round trips
+    # to the device overlap. Results are used in queue order, so the walk stays deterministic.
+    pool = ThreadPoolExecutor(max_workers=WALK_THREADS)
+    prefetched: dict[str, Future[list[PortableDeviceContent]]] = {}
+    try:
+        while walk_cont:
+            cont = walk_cont.popleft()
+            for queued in islice(walk_cont, WALK_PREFETCH):
+                if queued.full_filename not in prefetched:
+                    prefetched[queued.full_filename] = pool.submit(list, queued.get_children())
+            directories: list[PortableDeviceContent] = []
+            files: list[PortableDeviceContent] = []
+            try:
+                future = prefetched.pop(cont.full_filename, None)
+                for child in future.result() if future is not None else cont.get_children():
+                    contenttype = child.content_type
+                    if (
+                        contenttype == WPD_CONTENT_TYPE_DIRECTORY
+                        or contenttype == WPD_CONTENT_TYPE_STORAGE
+                    ):
+                        directories.append(child)
+                    elif contenttype == WPD_CONTENT_TYPE_FILE:
+                        files.append(child)
+                    if callback and not callback(child.full_filename):
+                        return
+                directories.sort(key=sort_key)
+                files.sort(key=sort_key)
+                yield cont.full_filename, directories, files
+            except Exception as err:
+                if error_callback is not None and not error_callback(str(err)):
                     return
-        walk_cont.extend(directories)
+            walk_cont.extend(directories)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def makedirs(dev: PortableDevice, path: str) -> PortableDeviceContent:
@@ -627,6 +918,7 @@ def makedirs(dev: PortableDevice, path: str) -> PortableDeviceContent:
     path = path.replace(dev_name, dev.get_device_path(), 1)
 
     try:
+        _invalidate_stat_cache(path)
         os.makedirs(path, exist_ok=True)
         return PortableDeviceContent(dev, path, WPD_CONTENT_TYPE_DIRECTORY)
     except IOError as err:
@@ -6,63 +6,173 @@ As comtypes isn't able to reload the with GetModule created files, we have to
 quit the programm if we changed the files. When the programm starts the next time
 comtypes findes the modified files and loads them.
 
+Generating the modules with GetModule is skipped as long as the DLLs they are made
+from haven't changed, see generated_modules_current.
+
 Author:  Heribert Füchtenhans
 
 Version: 2024.12.10
 
 """
 
+import contextlib
+import mmap
 import os
+import re
+import comtypes  # type: ignore # pylint: disable=import-error
+
+# The corrections: (anchor, method, old, new). The first 'old' that starts at most 300 characters
+# after the first 'method' behind 'anchor' is replaced by 'new'.
+_PATCHES: tuple[tuple[str, str, str, str], ...] = (
+    (
+        "IEnumPortableDeviceObjectIDs._methods_",
+        "'Next',",
+        "(['out'], POINTER(WSTRING), 'pObjIDs')",
+        "(['in', 'out'], POINTER(WSTRING), 'pObjIDs')",
+    ),
+    (
+        "IPortableDeviceContent._methods_",
+        "'CreateObjectWithPropertiesAndData'",
+        "(['out'], POINTER(POINTER(IStream)), 'ppData')",
+        "(['in', 'out'], POINTER(POINTER(IStream)), 'ppData')",
+    ),
+    (
+        "IPortableDeviceResources._methods_",
+        "'GetStream'",
+        "(['out'], POINTER(POINTER(IStream)), 'ppStream')",
+        "(['in', 'out'], POINTER(POINTER(IStream)), 'ppStream')",
+    ),
+    (
+        "tag_inner_PROPVARIANT._fields_ =",
+        "('__MIDL",
+        "('__MIDL____MIDL_itf_PortableDeviceApi_0001_00000001', __MIDL___MIDL_itf_"
+        "PortableDeviceApi_0001_0000_0001)",
+        "('data', __MIDL___MIDL_itf_PortableDeviceApi_0001_0000_0001)",
+    ),
+)
+
+# The file is patched as bytes, that saves decoding and encoding it. All strings are ASCII.
+_PATCHES_BYTES = tuple(tuple(part.encode("ascii") for part in entry) for entry in _PATCHES)
+
+# One pattern for all 'old' strings, so _needs_patch scans the file only once
+_PATCH_RE = re.compile(b"|".join(re.escape(entry[2]) for entry in _PATCHES_BYTES))
+
+
+# Part of the generation stamp, increase it if the generated modules have to be rebuilt
+GENERATION_VERSION = 1
+
+_STAMP_FILE = "win_mtp.stamp"
+
+
+def _generation_stamp(dlls: tuple[str, ...]) -> str:
+    """Returns the stamp of the DLLs the modules are generated from, it changes with their
+    mtime or size and with the comtypes version, whose generated modules check it at import.
+    An empty string is returned if a DLL can't be found."""
+    system_dir = os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32")
+    parts = [f"version {GENERATION_VERSION}", f"comtypes {comtypes.__version__}"]
+    try:
+        for dll in dlls:
+            st = os.stat(os.path.join(system_dir, dll))
+            parts.append(f"{dll} {st.st_mtime_ns} {st.st_size}")
+    except OSError:
+        return ""
+    return "\n".join(parts)
+
+
+def generated_modules_current(
+    gen_dir: str | None, dlls: tuple[str, ...], modules: tuple[str, ...]
+) -> bool:
+    """Returns True if the modules generated from the DLLs exist and the DLLs haven't changed
+    since, so GetModule needn't be called"""
+    if gen_dir is None or not all(
+        os.path.isfile(os.path.join(gen_dir, f"{name}.py")) for name in modules
+    ):
+        return False
+    stamp = _generation_stamp(dlls)
+    try:
+        with open(os.path.join(gen_dir, _STAMP_FILE), encoding="utf-8") as inp:
+            return stamp != "" and inp.read() == stamp
+    except OSError:
+        return False
+
+
+def write_generation_stamp(gen_dir: str | None, dlls: tuple[str, ...]) -> None:
+    """Stores the stamp of the DLLs after the modules were generated from them"""
+    if gen_dir is None or (stamp := _generation_stamp(dlls)) == "":
+        return
+    with contextlib.suppress(OSError):
+        with open(os.path.join(gen_dir, _STAMP_FILE), "w", encoding="utf-8") as outp:
+            outp.write(stamp)
 
 
 def modify_generated_files(gen_dir: str) -> None:
     """Modifies the from comtypes generated files because some call are incorrect"""
     filename = os.path.join(gen_dir, "_1F001332_1A57_4934_BE31_AFFC99F4EE0A_0_1_0.py")
-    with open(filename, encoding="utf-8") as inp:
+    marker = filename + ".patched"
+    # The marker carries the mtime of the last checked file. If comtypes hasn't regenerated
+    # the file since, there is nothing to do and we don't have to read it.
+    with contextlib.suppress(OSError):
+        if os.stat(filename).st_mtime_ns <= os.stat(marker).st_mtime_ns:
+            return
+    if not _needs_patch(filename):
+        _write_marker(filename, marker)
+        return
+    with open(filename, "rb") as inp:
         content = inp.read()
-    content_changed = False
-    for entry in (
-        (
-            "IEnumPortableDeviceObjectIDs._methods_",
-            "'Next',",
-            "(['out'], POINTER(WSTRING), 'pObjIDs')",
-            "(['in', 'out'], POINTER(WSTRING), 'pObjIDs')",
-        ),
-        (
-            "IPortableDeviceContent._methods_",
-            "'CreateObjectWithPropertiesAndData'",
-            "(['out'], POINTER(POINTER(IStream)), 'ppData')",
-            "(['in', 'out'], POINTER(POINTER(IStream)), 'ppData')",
-        ),
-        (
-            "IPortableDeviceResources._methods_",
-            "'GetStream'",
-            "(['out'], POINTER(POINTER(IStream)), 'ppStream')",
-            "(['in', 'out'], POINTER(POINTER(IStream)), 'ppStream')",
-        ),
-        (
-            "tag_inner_PROPVARIANT._fields_ =",
-            "('__MIDL",
-            "('__MIDL____MIDL_itf_PortableDeviceApi_0001_00000001', __MIDL___MIDL_itf_"
-            "PortableDeviceApi_0001_0000_0001)",
-            "('data', __MIDL___MIDL_itf_PortableDeviceApi_0001_0000_0001)",
-        ),
-    ):
-        pos = content.find(entry[0])
-        pos = content.find(entry[1], pos)
-        pos1 = content.find(entry[2], pos, pos + 300)
-        if pos1 > 0:
-            content = content[:pos1] + content[pos1:].replace(entry[2], entry[3], 1)
-            content_changed = True
+
+    patches = []
+    for anchor, method, old, new in _PATCHES_BYTES:
+        if (pos := _patch_position(content, anchor, method, old)) >= 0:
+            patches.append((pos, old, new))
         # else:
         #     print(
-        #         f"WARNING: Could not find '{entry[0]}' / '{entry[1]}' / '{entry[2]}', "
+        #         f"WARNING: Could not find '{anchor}' / '{method}' / '{old}', "
         #         "maybe it's already replaced."
         #     )
+    # Join the unchanged parts and the corrections, so the content is copied only once
+    parts = []
+    last = 0
+    for pos, old, new in sorted(patches):
+        parts += (content[last:pos], new)
+        last = pos + len(old)
+    parts.append(content[last:])
+    new_content = b"".join(parts)
+    content_changed = len(patches) > 0
     # Save all back when changed
     if content_changed:
         print("changed")
-        with open(filename, "w", encoding="utf-8") as outp:
-            outp.write(content)
+        # Replace the file at once, so an interrupted write can't leave a broken module
+        with open(filename + ".tmp", "wb") as outp:
+            outp.write(new_content)
+        os.replace(filename + ".tmp", filename)
+    _write_marker(filename, marker)
+    if content_changed:
         print("Sorry, but comtypes isn't able to reload the just modified files.\n" "So please restart the program.")
         quit()  # pylint: disable=consider-using-sys-exit
+
+
+def _patch_position(content: bytes, anchor: bytes, method: bytes, old: bytes) -> int:
+    """Returns the position of the 'old' to replace, -1 if there is none"""
+    if (pos := content.find(anchor)) < 0 or (pos := content.find(method, pos)) < 0:
+        return -1
+    return content.find(old, pos, pos + 300)
+
+
+def _needs_patch(filename: str) -> bool:
+    """Returns True if one of the 'old' strings is in the file. The file is searched memory
+    mapped, so an already patched file isn't copied into a bytes object."""
+    with open(filename, "rb") as inp:
+        try:
+            with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _PATCH_RE.search(mapped) is not None  # type: ignore
+        except ValueError:  # an empty file can't be mapped
+            return False
+
+
+def _write_marker(filename: str, marker: str) -> None:
+    """Creates the empty marker file with the mtime of filename"""
+    with contextlib.suppress(OSError):
+        with open(marker, "wb"):
+            pass
+        st = os.stat(filename)
+        os.utime(marker, ns=(st.st_atime_ns, st.st_mtime_ns))
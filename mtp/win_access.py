@@ -13,12 +13,15 @@ Requirements:
 OS:
     Windows 10
     Windows 11
-Python: 
+Python:
     comtypes
 
 The module contains the following functions:
 
 - 'get_portable_devices' Get all attached portable devices.
+- 'set_com_init_mode' - Sets how the module initializes COM.
+- 'init_thread' - Prepares a thread of the application for reading a device.
+- 'bind_to_thread' - Moves a content read in another thread into the calling thread.
 - 'get_content_from_device_path' - Get the content of a path.
 - 'walk' - Iterates ower all files in a tree.
 - 'makedirs' - Creates the directories on the MTP device if they don't exist.
@@ -32,26 +35,41 @@ All functions through IOError when a communication fails.
 
 Examples:
     >>> import mtp.win_access
-    >>> mtp.win_access.get_portable_devices()
-    [<PortableDevice: ('HSG1316', 'HSG1316')>]
+    >>> [dev.get_description() for dev in mtp.win_access.get_portable_devices()]
+    [('HSG1316', 'HSG1316')]
 """
 
+from collections import OrderedDict, deque
+from concurrent.futures import BrokenExecutor, Future, ThreadPoolExecutor
+import copy
 import ctypes
 import datetime
+import functools
 import io
 import os
+import queue
 import sys
-from typing import Any, IO, Callable, Generator, List, Optional, Tuple
+import threading
+import time
+import weakref
+from itertools import islice
+from operator import attrgetter
+from typing import Any, IO, Callable, Collection, Generator, List, Optional, Tuple
 import contextlib
 import comtypes  # type: ignore # pylint: disable=import-error
 import comtypes.client  # type: ignore # pylint: disable=import-error
 import comtypes.automation  # type: ignore # pylint: disable=import-error
 
 if not hasattr(sys, "frozen"):
-    comtypes.client.GetModule("portabledeviceapi.dll")
-    comtypes.client.GetModule("portabledevicetypes.dll")
     from . import modify_comtypes
 
+    _DLLS = ("portabledeviceapi.dll", "portabledevicetypes.dll")
+    if not modify_comtypes.generated_modules_current(
+        comtypes.client.gen_dir, _DLLS, ("PortableDeviceApiLib", "PortableDeviceTypesLib")  # type: ignore
+    ):
+        for dll in _DLLS:
+            comtypes.client.GetModule(dll)
+        modify_comtypes.write_generation_stamp(comtypes.client.gen_dir, _DLLS)  # type: ignore
     modify_comtypes.modify_generated_files(comtypes.client.gen_dir)  # type: ignore
 
 import comtypes.gen.PortableDeviceApiLib as port  # pylint: disable=all # type: ignore
@@ -92,6 +110,13 @@ WPD_DEVICE_SERIAL_NUMBER.contents.fmtid = comtypes.GUID("{26D4979A-E643-4626-9E2
 WPD_DEVICE_SERIAL_NUMBER.contents.pid = 9
 #  0x26D4979A, 0xE643, 0x4626, 0x9E, 0x2B, 0x73, 0x6D, 0xC0, 0xC9, 0x2F, 0xDC ,  9
 
+# ---------
+WPD_OBJECT_ID = comtypes.pointer(
+    port._tagpropertykey()  # pylint: disable=no-member, protected-access # type: ignore
+)
+WPD_OBJECT_ID.contents.fmtid = comtypes.GUID("{EF6B490D-5CD8-437A-AFFC-DA8B60EE4A3C}")
+WPD_OBJECT_ID.contents.pid = 2
+
 # ---------
 WPD_OBJECT_PARENT_ID = comtypes.pointer(
     port._tagpropertykey()  # pylint: disable=no-member, protected-access # type: ignore
@@ -136,6 +161,16 @@ WPD_OBJECT_DATE_MODIFIED.contents.pid = 19
 # ----------
 WPD_CONTENT_TYPE_FOLDER_GUID = comtypes.GUID("{27E2E392-A111-48E0-AB0C-E17705A05F85}")
 
+# Content types that are reported as storage: WPD_FUNCTIONAL_CATEGORY_STORAGE and
+# WPD_CONTENT_TYPE_FUNCTIONAL_OBJECT. GUIDs compare by their bytes, so no string formatting
+# per object.
+_STORAGE_GUIDS = frozenset(
+    (
+        comtypes.GUID("{23F05BBC-15DE-4C2A-A55B-A9AF5CE412EF}"),
+        comtypes.GUID("{99ED0160-17FF-4C44-9D98-1D7A6F941921}"),
+    )
+)
+
 
 # Constants for the type entries returned bei PortableDeviceContent.get_properties
 WPD_CONTENT_TYPE_UNDEFINED = -1
@@ -144,12 +179,371 @@ WPD_CONTENT_TYPE_DIRECTORY = 1
 WPD_CONTENT_TYPE_FILE = 2
 WPD_CONTENT_TYPE_DEVICE = 3
 
+# Content types walk descends into
+_DIR_TYPES = frozenset((WPD_CONTENT_TYPE_STORAGE, WPD_CONTENT_TYPE_DIRECTORY))
+
+# Content type GUID -> WPD_CONTENT_TYPE_ constant
+_CONTENT_TYPES = {guid: WPD_CONTENT_TYPE_STORAGE for guid in _STORAGE_GUIDS}
+_CONTENT_TYPES[WPD_CONTENT_TYPE_FOLDER_GUID] = WPD_CONTENT_TYPE_DIRECTORY
+
 # Constants for delete
 WPD_DELETE_NO_RECURSION = 0
 WPD_DELETE_WITH_RECURSION = 1
 
+
+class _SYSTEMTIME(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """Win32 SYSTEMTIME"""
+
+    _fields_ = [
+        ("wYear", ctypes.c_ushort),
+        ("wMonth", ctypes.c_ushort),
+        ("wDayOfWeek", ctypes.c_ushort),
+        ("wDay", ctypes.c_ushort),
+        ("wHour", ctypes.c_ushort),
+        ("wMinute", ctypes.c_ushort),
+        ("wSecond", ctypes.c_ushort),
+        ("wMilliseconds", ctypes.c_ushort),
+    ]
+
+
+# The OLE VT_DATE of the WPD date properties counts days since 1899-12-30
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+_OLE_EPOCH_TO_UNIX_DAYS = (_UNIX_EPOCH - datetime.datetime(1899, 12, 30)).days
+
+# Converts a VT_DATE, None if oleaut32 isn't available
+_VariantTimeToSystemTime: Optional[Any] = None
+with contextlib.suppress(AttributeError, OSError):
+    _VariantTimeToSystemTime = ctypes.windll.oleaut32.VariantTimeToSystemTime
+    _VariantTimeToSystemTime.restype = ctypes.c_int
+    _VariantTimeToSystemTime.argtypes = [ctypes.c_double, ctypes.POINTER(_SYSTEMTIME)]
+
+# Frees the strings the WPD API allocates for us
+_CoTaskMemFree = ctypes.windll.ole32.CoTaskMemFree
+_CoTaskMemFree.restype = None
+_CoTaskMemFree.argtypes = [ctypes.c_void_p]
+
+# Pointer types used in the COM calls
+_WCHAR_P_P = ctypes.POINTER(ctypes.c_wchar_p)
+_USHORT_P = ctypes.POINTER(ctypes.c_ushort)
+_UBYTE_P = ctypes.POINTER(ctypes.c_ubyte)
+_ISTREAM_P = ctypes.POINTER(port.IStream)  # pylint: disable=no-member # type: ignore
+_VALUES_P = ctypes.POINTER(port.IPortableDeviceValues)  # pylint: disable=no-member # type: ignore
+
+# Minimum block size for up- and downloads. Many drivers report a rather small optimal
+# transfer size, larger blocks mean less RemoteRead/RemoteWrite calls.
+MIN_TRANSFER_SIZE = 1024 * 1024
+
+# Number of object ids requested with one IEnumPortableDeviceObjectIDs.Next call. Each call is
+# a round trip to the device.
+ENUM_BATCH_SIZE = 256
+
+# Number of device ids get_portable_devices reserves space for, more need a second call
+DEVICE_ID_SLOTS = 16
+
+# Number of threads, each with its own connection to the device, that list directories ahead
+# in walk and how many queued directories are listed in advance. Drivers that serialize the
+# requests of all connections just gain less.
+WALK_THREADS = 4
+WALK_PREFETCH = 8
+
+# Separator of the paths on the device, both \ and / are accepted in paths given to us
+_SEP = os.path.sep
+_PATH_NORM = str.maketrans({"\\": _SEP, "/": _SEP})
+
+# Number of paths per device whose object id is remembered by get_path
+PATH_CACHE_SIZE = 1024
+
+# Maximum seconds to wait for a bulk property read before falling back to single reads
+BULK_READ_TIMEOUT = 60.0
+
 # Module variables
 DEVICE_MANAGER: Optional[Any] = None
+# How get_portable_devices initializes COM, see set_com_init_mode
+_COM_INIT_MODES = ("auto", "mta", "caller")
+# HRESULT of CoInitializeEx if the thread is already a single threaded apartment
+_RPC_E_CHANGED_MODE = 0x80010106
+_com_init_mode = "auto"
+_com_initialized = threading.local()
+# Ids of the devices without a friendly name, they are not asked for it again
+_NO_FRIENDLY_NAME: set[str] = set()
+# Per thread pools of reusable COM objects, see _borrow
+_com_pools = threading.local()
+# Per thread key collections, see _properties_to_read
+_key_collections = threading.local()
+# Roots of the devices the thread was prepared for with init_thread, by device id
+_thread_roots = threading.local()
+
+
+# -------------------------------------------------------------------------------------------------
+class _BulkPropertiesCallback(comtypes.COMObject):  # type: ignore
+    """Receives the results of IPortableDevicePropertiesBulk. The values of all objects are
+    collected by their object id until the driver calls OnEnd."""
+
+    _com_interfaces_ = [
+        port.IPortableDevicePropertiesBulkCallback  # pylint: disable=no-member # type: ignore
+    ]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: dict[str, Any] = {}
+        self.hresult = 0
+        self.finished = threading.Event()
+
+    def OnStart(self, _context: Any) -> None:  # pylint: disable=invalid-name
+        """Called by the driver when the bulk operation starts"""
+
+    def OnProgress(self, _context: Any, results: Any) -> None:  # pylint: disable=invalid-name
+        """Called by the driver with the values of some of the objects"""
+        count = ctypes.c_ulong()
+        results.GetCount(ctypes.pointer(count))  # type: ignore
+        for index in range(count.value):
+            propvalues = results.GetAt(index)  # type: ignore
+            with contextlib.suppress(comtypes.COMError):
+                self.values[propvalues.GetStringValue(WPD_OBJECT_ID)] = propvalues  # type: ignore
+
+    def OnEnd(self, _context: Any, hresult: int) -> None:  # pylint: disable=invalid-name
+        """Called by the driver when all values are delivered"""
+        self.hresult = hresult
+        self.finished.set()
+
+
+# -------------------------------------------------------------------------------------------------
+class _DeviceCOM:  # pylint: disable=too-few-public-methods
+    """The COM interfaces of an opened device. They are fetched once per device and shared by
+    all PortableDeviceContent instances of it.
+
+    Args:
+        content: interface to IPortableDeviceContent.
+        open_connection: Bound method that opens another connection to the device. If given,
+                    object ids are enumerated by a background thread with its own connection.
+    """
+
+    __slots__ = (
+        "content",
+        "properties",
+        "properties_bulk",
+        "_resources",
+        "_path_ids",
+        "_open_connection",
+        "_enum_thread",
+    )
+
+    def __init__(
+        self, content: Any, open_connection: Optional[Callable[[], "_DeviceCOM"]] = None
+    ) -> None:
+        self.content = content
+        self.properties = content.properties()  # type: ignore
+        # None if the driver doesn't support bulk reads
+        self.properties_bulk: Optional[Any] = None
+        with contextlib.suppress(comtypes.COMError):
+            self.properties_bulk = self.properties.QueryInterface(  # type: ignore
+                port.IPortableDevicePropertiesBulk  # pylint: disable=no-member # type: ignore
+            )
+        self._resources: Optional[Any] = None
+        # LRU cache full path -> object id for get_path
+        self._path_ids: OrderedDict[str, str] = OrderedDict()
+        self._open_connection = open_connection
+        self._enum_thread: Optional[ThreadPoolExecutor] = None
+
+    def get_path_id(self, path: str) -> Optional[str]:
+        """Returns the remembered object id of path or None"""
+        object_id = self._path_ids.get(path)
+        if object_id is not None:
+            self._path_ids.move_to_end(path)
+        return object_id
+
+    def set_path_id(self, path: str, object_id: str) -> None:
+        """Remembers the object id of path"""
+        self._path_ids[path] = object_id
+        self._path_ids.move_to_end(path)
+        if len(self._path_ids) > PATH_CACHE_SIZE:
+            self._path_ids.popitem(last=False)
+
+    def forget_path(self, path: str) -> None:
+        """Forgets the object ids of path and everything below it"""
+        prefix = path + _SEP
+        for cached in [
+            cached for cached in self._path_ids if cached == path or cached.startswith(prefix)
+        ]:
+            del self._path_ids[cached]
+
+    def get_resources(self) -> Any:
+        """Returns the IPortableDeviceResources interface, fetched on first use"""
+        if self._resources is None:
+            self._resources = self.content.Transfer()  # type: ignore
+        return self._resources
+
+    def enum_object_ids(self, parent_id: Any) -> Generator[List[str], None, None]:
+        """Yields the object ids of the children of parent_id in batches.
+        If possible the next batch is fetched by the enumeration thread while the caller works
+        on the current one. Without that thread the ids are enumerated in the calling thread."""
+        if self._open_connection is not None and self._enum_thread is None:
+            self._enum_thread = ThreadPoolExecutor(
+                max_workers=1,
+                initializer=_init_enum_thread,
+                # The thread must not keep the device alive, it is stopped when the device
+                # is deleted
+                initargs=(weakref.WeakMethod(self._open_connection),),  # type: ignore
+            )
+        # close may be called while the ids are enumerated
+        if (enum_thread := self._enum_thread) is None:
+            yield from _enum_object_ids(self.content, parent_id)
+            return
+        batches: queue.Queue[Any] = queue.Queue()
+        cancel = threading.Event()
+        future = enum_thread.submit(_produce_object_ids, parent_id, batches, cancel)
+        future.add_done_callback(
+            lambda done: done.exception() is not None and batches.put(done.exception())
+        )
+        received = False
+        try:
+            while (batch := batches.get()) is not None:
+                if isinstance(batch, BrokenExecutor) and not received:
+                    # The thread couldn't open the device, enumerate here from now on
+                    enum_thread.shutdown(wait=False)
+                    self._open_connection = self._enum_thread = None
+                    yield from _enum_object_ids(self.content, parent_id)
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+                received = True
+                yield batch
+        finally:
+            cancel.set()
+
+    def close(self) -> None:
+        """Stops the enumeration thread. Its connection is released in the thread itself after
+        the running enumeration, afterwards the ids are enumerated in the calling thread."""
+        self._open_connection = None
+        if self._enum_thread is not None:
+            # Fails while the interpreter shuts down, the thread ends anyway then
+            with contextlib.suppress(RuntimeError):
+                self._enum_thread.submit(_close_enum_thread)
+            self._enum_thread.shutdown(wait=False)
+            self._enum_thread = None
+
+
+# -------------------------------------------------------------------------------------------------
+def _enum_object_ids(content: Any, parent_id: Any) -> Generator[List[str], None, None]:
+    """Yields the object ids of the children of parent_id in batches of up to ENUM_BATCH_SIZE.
+
+    Args:
+        content: The IPortableDeviceContent interface to use
+        parent_id: The object id of the parent
+    """
+    enumobject_ids = content.EnumObjects(  # type: ignore
+        ctypes.c_ulong(0),
+        parent_id,
+        _VALUES_P(),
+    )
+    # Next fills the same array on every call, it reports how many entries are valid
+    num_objects = ctypes.c_ulong(ENUM_BATCH_SIZE)
+    object_id_array = (ctypes.c_wchar_p * ENUM_BATCH_SIZE)()
+    object_id_ptr = ctypes.cast(object_id_array, _WCHAR_P_P)
+    num_fetched = ctypes.pointer(ctypes.c_ulong(0))
+    while True:
+        # be sure to change the IEnumPortableDeviceobject_ids 'Next'
+        # function in the generated code to have object_ids as inout
+        enumobject_ids.Next(  # type: ignore
+            num_objects,
+            object_id_ptr,
+            num_fetched,
+        )
+        if num_fetched.contents.value == 0:
+            break
+        count = num_fetched.contents.value
+        # The slice copies the ids into python strings, so the memory of the driver
+        # can be freed at once for the whole batch
+        object_ids: List[str] = object_id_array[:count]  # type: ignore
+        for address in (ctypes.c_void_p * count).from_buffer(object_id_array):
+            _CoTaskMemFree(address)
+        yield object_ids
+
+
+def _create_key_collection(*keys: Any) -> Any:
+    """Creates an IPortableDeviceKeyCollection with the given property keys"""
+    collection = comtypes.client.CreateObject(
+        types.PortableDeviceKeyCollection,  # pylint: disable=no-member # type: ignore
+        clsctx=comtypes.CLSCTX_INPROC_SERVER,
+        interface=port.IPortableDeviceKeyCollection,  # pylint: disable=no-member # type: ignore
+    )
+    for key in keys:
+        collection.Add(key)  # type: ignore
+    return collection
+
+
+@contextlib.contextmanager
+def _borrow(clsid: Any, interface: Any) -> Generator[Any, None, None]:
+    """Lends an instance of the COM class clsid from the pool of the calling thread. Creating
+    one with CreateObject is expensive, so they are cleared and kept after use."""
+    if (pools := getattr(_com_pools, "pools", None)) is None:
+        pools = _com_pools.pools = {}
+    pool = pools.setdefault(clsid, [])
+    obj = (
+        pool.pop()
+        if pool
+        else comtypes.client.CreateObject(
+            clsid, clsctx=comtypes.CLSCTX_INPROC_SERVER, interface=interface
+        )
+    )
+    yield obj
+    # Only objects that could be cleared are used again
+    with contextlib.suppress(comtypes.COMError):
+        obj.Clear()  # type: ignore
+        pool.append(obj)
+
+
+def _borrow_values() -> contextlib.AbstractContextManager[Any]:
+    """Lends an empty IPortableDeviceValues"""
+    return _borrow(
+        types.PortableDeviceValues,  # pylint: disable=no-member # type: ignore
+        port.IPortableDeviceValues,  # pylint: disable=no-member # type: ignore
+    )
+
+
+def _borrow_prop_variants() -> contextlib.AbstractContextManager[Any]:
+    """Lends an empty IPortableDevicePropVariantCollection"""
+    return _borrow(
+        types.PortableDevicePropVariantCollection,  # pylint: disable=no-member # type: ignore
+        port.IPortableDevicePropVariantCollection,  # pylint: disable=no-member # type: ignore
+    )
+
+
+def _properties_to_read(minimal: bool = False) -> Any:
+    """Returns the key collection of the properties we read, with minimal only name and content
+    type. COM objects can't be shared between threads, so each thread creates its own once."""
+    if (collections := getattr(_key_collections, "collections", None)) is None:
+        collections = _key_collections.collections = (
+            _create_key_collection(
+                WPD_OBJECT_NAME,
+                WPD_OBJECT_ORIGINAL_FILE_NAME,
+                WPD_OBJECT_CONTENT_TYPE,
+                WPD_OBJECT_SIZE,
+                WPD_OBJECT_DATE_MODIFIED,
+                WPD_OBJECT_DATE_CREATED,
+                WPD_STORAGE_CAPACITY,
+                WPD_STORAGE_FREE_SPACE_IN_BYTES,
+                WPD_DEVICE_SERIAL_NUMBER,
+                WPD_OBJECT_ID,
+                WPD_OBJECT_PARENT_ID,
+            ),
+            _create_key_collection(
+                WPD_OBJECT_NAME,
+                WPD_OBJECT_ORIGINAL_FILE_NAME,
+                WPD_OBJECT_CONTENT_TYPE,
+                WPD_OBJECT_ID,
+                WPD_OBJECT_PARENT_ID,
+            ),
+        )
+    return collections[minimal]
+
+
+def _add_object_id(collection: Any, object_id: str) -> None:
+    """Adds an object id to an IPortableDevicePropVariantCollection"""
+    pvar = port.tag_inner_PROPVARIANT()  # pylint: disable=no-member # type: ignore
+    pvar.vt = comtypes.automation.VT_LPWSTR
+    pvar.data.pwszVal = ctypes.c_wchar_p(object_id)
+    collection.Add(pvar)  # type: ignore
 
 
 # -------------------------------------------------------------------------------------------------
@@ -159,12 +553,16 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
 
     Args:
         object_id: MTP object id.
-        content: interface to IPortableDeviceContent.
-        properties: The interface that is required to get or set properties on an object on
-                    the device.
+        device_com: The COM interfaces of the device the object belongs to.
+        parent_path: The path of the parent directory
+        values: The already read IPortableDeviceValues of the object, e.g. from a bulk read.
+                    If None, the properties are read with GetValues.
+        minimal: If True only name and content type are read. The other properties are read
+                    on first access.
 
     Public methods:
         get_properties
+        get_type_and_name
         get_children
         get_child
         get_path
@@ -172,6 +570,7 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
         upload_file
         download_file
         remove
+        remove_many
 
     Public attributes:
         name: Name of the MTP device
@@ -184,52 +583,52 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
         IOError: If something went wrong
     """
 
-    # class variable
-    _properties_to_read: Optional[types.PortableDeviceKeyCollection] = None  # pylint: disable=no-member # type: ignore
-
-    _CoTaskMemFree = ctypes.windll.ole32.CoTaskMemFree
-    _CoTaskMemFree.restype = None
-    _CoTaskMemFree.argtypes = [ctypes.c_void_p]
-
     def __init__(
         self,
         object_id: Any,
-        content: "PortableDeviceContent",
-        properties: Optional[Any] = None,
+        device_com: _DeviceCOM,
         parent_path: str = "",
+        values: Optional[Any] = None,
+        minimal: bool = False,
     ) -> None:
         """ """
 
         self._object_id = object_id
-        self._content: "PortableDeviceContent" = content
+        self._com = device_com
         self._parent_path = parent_path
         self.name: str = ""
         self._plain_name: str = ""
+        self._parent_id: str = ""
         self.content_type: int = WPD_CONTENT_TYPE_UNDEFINED
         self.full_filename: str = ""
-        self.size: int = -1
-        self.date_created: datetime.datetime = datetime.datetime(1970, 1, 1)
+        self._size: int = -1
+        self._date_created: datetime.datetime = _UNIX_EPOCH
+        # False as long as only the minimal properties are read
+        self._complete = False
         self._capacity: int = -1
         self._free_capacity: int = -1
         self._serialnumber: str = ""
-        self._properties = properties or content.properties()  # type: ignore
-        if PortableDeviceContent._properties_to_read is None:
-            # We havn't set the roperties wie will read, so do it now
-            PortableDeviceContent._properties_to_read = comtypes.client.CreateObject(
-                types.PortableDeviceKeyCollection,  # pylint: disable=no-member, protected-access # type: ignore
-                clsctx=comtypes.CLSCTX_INPROC_SERVER,  # pylint: disable=no-member, protected-access
-                interface=port.IPortableDeviceKeyCollection,  # pylint: disable=no-member, protected-access # type: ignore
+        if values is not None:
+            self._set_properties(values, minimal)
+        elif minimal and self._object_id is not None:
+            self._set_properties(
+                self._com.properties.GetValues(self._object_id, _properties_to_read(minimal=True)),  # type: ignore
+                True,
             )
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_NAME)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_ORIGINAL_FILE_NAME)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_CONTENT_TYPE)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_SIZE)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_DATE_MODIFIED)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_OBJECT_DATE_CREATED)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_STORAGE_CAPACITY)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_STORAGE_FREE_SPACE_IN_BYTES)  # type: ignore
-            PortableDeviceContent._properties_to_read.Add(WPD_DEVICE_SERIAL_NUMBER)  # type: ignore
-        self.get_properties()
+        else:
+            self.get_properties()
+
+    @property
+    def size(self) -> int:
+        """The size of the file in bytes"""
+        self._read_all_properties()
+        return self._size
+
+    @property
+    def date_created(self) -> datetime.datetime:
+        """The modification date of the file with the time of day"""
+        self._read_all_properties()
+        return self._date_created
 
     def get_properties(
         self,
@@ -257,45 +656,86 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> cont.get_properties()
             ('HSG1316', 0, -1, datetime.datetime(1970, 1, 1, 0, 0), -1, -1, 'DQVSSCM799999999')
         """
-        if self._plain_name:
-            return (
-                self.name,
-                self.content_type,
-                self.size,
-                self.date_created,
-                self._capacity,
-                self._free_capacity,
-                self._serialnumber,
-            )
         if self._object_id is None:
             return (
                 "",
                 WPD_CONTENT_TYPE_UNDEFINED,
                 -1,
-                self.date_created,
+                self._date_created,
                 self._capacity,
                 self._free_capacity,
                 self._serialnumber,
             )
-        propvalues = self._properties.GetValues(  # type: ignore
-            self._object_id, PortableDeviceContent._properties_to_read
+        self._read_all_properties()
+        return (
+            self.name,
+            self.content_type,
+            self._size,
+            self._date_created,
+            self._capacity,
+            self._free_capacity,
+            self._serialnumber,
         )
-        self.content_type = WPD_CONTENT_TYPE_UNDEFINED
-        try:
-            self._plain_name = str(propvalues.GetStringValue(WPD_OBJECT_NAME))  # type: ignore
-        except comtypes.COMError:
-            self.content_type = WPD_CONTENT_TYPE_DIRECTORY
-            self.name = self._plain_name = ""
+
+    def get_type_and_name(self) -> Tuple[int, str]:
+        """Get the content type and the name of this content. Both are read with the minimal
+        properties when the instance is created, so unlike get_properties this never reads the
+        size, date and storage values from the device.
+
+        Returns:
+            content_type: One of the WPD_CONTENT_TYPE_ constants
+            name: The name for this content, normaly the file or directory name
+
+        Examples:
+            >>> import mtp.win_access
+            >>> dev = mtp.win_access.get_portable_devices()
+            >>> cont = dev[0].get_content()[0].get_path("Interner Speicher\\Music")
+            >>> cont.get_type_and_name()
+            (1, 'Music')
+        """
+        return self.content_type, self.name
+
+    def _read_all_properties(self) -> None:
+        """Reads all properties if up to now only the minimal properties are read"""
+        if not self._complete and self._object_id is not None:
+            self._set_properties(
+                self._com.properties.GetValues(self._object_id, _properties_to_read())  # type: ignore
+            )
+
+    def _set_properties(self, propvalues: Any, minimal: bool = False) -> None:
+        """Sets the attributes from the IPortableDeviceValues read for this object. If minimal is
+        True, propvalues only contains the keys of _properties_to_read(minimal=True)."""
+        # The original file name wins, the object name is only read if there is none
+        get_string_value = propvalues.GetStringValue  # type: ignore
         try:
-            self.name = self._plain_name = str(propvalues.GetStringValue(WPD_OBJECT_ORIGINAL_FILE_NAME))  # type: ignore
+            name = get_string_value(WPD_OBJECT_ORIGINAL_FILE_NAME)
         except comtypes.COMError:
-            self.name = self._plain_name
-        content_id = str(propvalues.GetGuidValue(WPD_OBJECT_CONTENT_TYPE))  # type: ignore
-        if content_id in {
-            "{23F05BBC-15DE-4C2A-A55B-A9AF5CE412EF}",
-            "{99ED0160-17FF-4C44-9D98-1D7A6F941921}",
-        }:
-            # It's a storage
+            try:
+                name = get_string_value(WPD_OBJECT_NAME)
+            except comtypes.COMError:
+                name = ""
+        self.name = self._plain_name = name
+        with contextlib.suppress(comtypes.COMError):
+            self._parent_id = get_string_value(WPD_OBJECT_PARENT_ID)
+        # Everything that is not a storage or folder is a file
+        self.content_type = _CONTENT_TYPES.get(
+            propvalues.GetGuidValue(WPD_OBJECT_CONTENT_TYPE), WPD_CONTENT_TYPE_FILE  # type: ignore
+        )
+        # If minimal, size, date and the storage values are read later by _read_all_properties
+        if not minimal:
+            self._set_type_properties(propvalues)
+        # Both parts are plain names on the device, so no os.path.join needed
+        self.full_filename = (
+            f"{self._parent_path}{_SEP}{self._plain_name}"
+            if self._parent_path
+            else self._plain_name
+        )
+        self._complete = not minimal
+
+    def _set_type_properties(self, propvalues: Any) -> None:
+        """Sets the attributes that depend on the content type, the sizes of a storage or the
+        size and date of a file"""
+        if self.content_type == WPD_CONTENT_TYPE_STORAGE:
             try:
                 self._capacity = int(propvalues.GetUnsignedLargeIntegerValue(WPD_STORAGE_CAPACITY))  # type: ignore
             except comtypes.COMError:
@@ -307,43 +747,81 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             except comtypes.COMError:
                 self._free_capacity = -1
             with contextlib.suppress(comtypes.COMError):
-                self._serialnumber = str(propvalues.GetStringValue(WPD_DEVICE_SERIAL_NUMBER))  # type: ignore
-            self.content_type = WPD_CONTENT_TYPE_STORAGE
-        elif content_id == "{27E2E392-A111-48E0-AB0C-E17705A05F85}":
-            # It's a directory
-            self.content_type = WPD_CONTENT_TYPE_DIRECTORY
-        else:
-            # it's not a folder or storage
-            self.content_type = WPD_CONTENT_TYPE_FILE
-            self.size = int(propvalues.GetUnsignedLargeIntegerValue(WPD_OBJECT_SIZE))  # type: ignore
-            filetime = int(propvalues.GetValue(WPD_OBJECT_DATE_MODIFIED).data.date)  # type: ignore
-            days_since_1970 = filetime - (datetime.datetime(1970, 1, 1) - datetime.datetime(1899, 12, 30)).days
-            hours = (filetime - int(filetime)) * 24
-            minutes = (hours - int(hours)) * 60
-            seconds = (minutes - int(minutes)) * 60
-            milliseconds = round((seconds - int(seconds)) * 1000)
-            self.date_created = datetime.datetime(1970, 1, 1) + datetime.timedelta(
-                days=days_since_1970,
-                hours=int(hours),
-                minutes=int(minutes),
-                seconds=int(seconds),
-                milliseconds=milliseconds,
+                self._serialnumber = propvalues.GetStringValue(WPD_DEVICE_SERIAL_NUMBER)  # type: ignore
+        elif self.content_type == WPD_CONTENT_TYPE_FILE:
+            self._size = int(propvalues.GetUnsignedLargeIntegerValue(WPD_OBJECT_SIZE))  # type: ignore
+            variant_time = float(propvalues.GetValue(WPD_OBJECT_DATE_MODIFIED).data.date)  # type: ignore
+            if _VariantTimeToSystemTime is None:
+                self._date_created = _UNIX_EPOCH + datetime.timedelta(
+                    days=variant_time - _OLE_EPOCH_TO_UNIX_DAYS
+                )
+            else:
+                systime = _SYSTEMTIME()
+                if _VariantTimeToSystemTime(variant_time, ctypes.byref(systime)):
+                    self._date_created = datetime.datetime(
+                        systime.wYear,
+                        systime.wMonth,
+                        systime.wDay,
+                        systime.wHour,
+                        systime.wMinute,
+                        systime.wSecond,
+                        systime.wMilliseconds * 1000,
+                    )
+
+    def _read_values_bulk(self, object_ids: List[str], keys: Any) -> dict[str, Any]:
+        """Reads the properties of all objects with one IPortableDevicePropertiesBulk request
+        instead of one GetValues round trip per object.
+
+        Args:
+            object_ids: The ids of the objects to read
+            keys: The IPortableDeviceKeyCollection with the properties to read
+
+        Returns:
+            A dict object id -> IPortableDeviceValues. The dict is empty if the driver doesn't
+            support bulk reads, objects missing in it must be read with GetValues.
+        """
+        bulk = self._com.properties_bulk
+        if bulk is None or len(object_ids) < 2:
+            return {}
+        try:
+            object_id_collection = comtypes.client.CreateObject(
+                types.PortableDevicePropVariantCollection,  # pylint: disable=no-member # type: ignore
+                clsctx=comtypes.CLSCTX_INPROC_SERVER,
+                interface=port.IPortableDevicePropVariantCollection,  # pylint: disable=no-member # type: ignore
             )
-        propvalues.Clear()  # type: ignore
-        self.full_filename = os.path.join(self._parent_path, self._plain_name)
-        return (
-            self.name,
-            self.content_type,
-            self.size,
-            self.date_created,
-            self._capacity,
-            self._free_capacity,
-            self._serialnumber,
-        )
+            for object_id in object_ids:
+                pvar = port.tag_inner_PROPVARIANT()  # pylint: disable=no-member # type: ignore
+                pvar.vt = comtypes.automation.VT_LPWSTR
+                pvar.data.pwszVal = ctypes.c_wchar_p(object_id)
+                object_id_collection.Add(pvar)  # type: ignore
+            callback = _BulkPropertiesCallback()
+            context = bulk.QueueGetValuesByObjectList(  # type: ignore
+                object_id_collection, keys, callback
+            )
+            bulk.Start(context)  # type: ignore
+            # The callbacks are delivered through the message queue of this thread
+            end_time = time.monotonic() + BULK_READ_TIMEOUT
+            while not callback.finished.is_set():
+                if time.monotonic() > end_time:
+                    bulk.Cancel(context)  # type: ignore
+                    return {}
+                comtypes.client.PumpEvents(0.01)  # type: ignore
+            return callback.values if callback.hresult >= 0 else {}
+        except comtypes.COMError:
+            return {}
 
-    def get_children(self) -> Generator["PortableDeviceContent", None, None]:
+    def get_children(
+        self, content_types: Optional[Collection[int]] = None, minimal: bool = False
+    ) -> Generator["PortableDeviceContent", None, None]:
         """Get the child items of a folder.
 
+        Args:
+            content_types: If given, only children whose content_type is in this collection
+                        are returned, e.g. (WPD_CONTENT_TYPE_STORAGE, WPD_CONTENT_TYPE_DIRECTORY)
+                        to skip all files.
+            minimal: If True only name and content type of the children are read. Size, date
+                        and the other properties are then read for each child on first access.
+
         Returns:
             A Generator of PortableDeviceContent instances each representing a child entry.
 
@@ -355,32 +833,18 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             "<PortableDeviceContent s10001: ('Interner Speicher', 0, -1"
         """
         try:
-            enumobject_ids = self._content.EnumObjects(  # type: ignore
-                ctypes.c_ulong(0),
-                self._object_id,
-                ctypes.POINTER(port.IPortableDeviceValues)(),  # pylint: disable=no-member # type: ignore
-            )
-            while True:
-                num_objects = ctypes.c_ulong(16)  # block size, so to speak
-                object_id_array = (ctypes.c_wchar_p * num_objects.value)()
-                num_fetched = ctypes.pointer(ctypes.c_ulong(0))
-                # be sure to change the IEnumPortableDeviceobject_ids 'Next'
-                # function in the generated code to have object_ids as inout
-                enumobject_ids.Next(  # type: ignore
-                    num_objects,
-                    ctypes.cast(object_id_array, ctypes.POINTER(ctypes.c_wchar_p)),
-                    num_fetched,
-                )
-                if num_fetched.contents.value == 0:
-                    break
-                for index in range(num_fetched.contents.value):
-                    curobject_id = object_id_array[index]
-                    value = PortableDeviceContent(curobject_id, self._content, self._properties, self.full_filename)  # type: ignore
-                    # Free memory
-                    address = ctypes.addressof(object_id_array) + ctypes.sizeof(ctypes.c_wchar_p) * index
-                    ptr = ctypes.pointer(ctypes.c_wchar_p.from_address(address))
-                    ctypes.windll.ole32.CoTaskMemFree(ptr.contents)
-                    yield value
+            for object_ids in self._com.enum_object_ids(self._object_id):
+                bulk_values = self._read_values_bulk(object_ids, _properties_to_read(minimal))
+                for curobject_id in object_ids:
+                    value = PortableDeviceContent(
+                        curobject_id,
+                        self._com,
+                        self.full_filename,
+                        values=bulk_values.get(curobject_id),
+                        minimal=minimal,
+                    )
+                    if content_types is None or value.content_type in content_types:
+                        yield value
         except comtypes.COMError as err:
             raise IOError(f"Error getting child item from '{self.full_filename}': {err.args[1]}")
 
@@ -402,8 +866,11 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> str(cont.get_child("Interner Speicher"))[:58]
             "<PortableDeviceContent s10001: ('Interner Speicher', 0, -1"
         """
-        matches = [c for c in self.get_children() if c.name == name]
-        return matches[0] if matches else None
+        # Only the name is needed to compare, the rest is read on demand of the found child
+        # Stops enumerating at the first match, later batches of ids are never requested
+        return next(
+            (child for child in self.get_children(minimal=True) if child.name == name), None
+        )
 
     def get_path(self, path: str) -> Optional["PortableDeviceContent"]:
         """Returns a PortableDeviceContent for a child whos path in the tree is known
@@ -424,22 +891,60 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             "<PortableDeviceContent oE: ('data', 1, -1"
         """
         cur: Optional["PortableDeviceContent"] = self
-        for part in path.split(os.path.sep):
+        parts = path.split(_SEP)
+        # Start at the deepest directory of path whose object id we already know
+        for index in range(len(parts), 0, -1):
+            if cached := self._get_cached_path(parts[:index]):
+                cur = cached
+                parts = parts[index:]
+                break
+        for part in parts:
             if not cur:
                 return None
             cur = cur.get_child(part)
+            if cur:
+                self._com.set_path_id(cur.full_filename, cur._object_id)
         return cur
 
+    def _get_cached_path(self, parts: List[str]) -> Optional["PortableDeviceContent"]:
+        """Returns the content of the path parts below this content if the object ids of it and
+        of all directories above it are cached and still form this path, else None. So a path
+        isn't taken from the cache if one of its directories was renamed or moved."""
+        paths = [
+            os.path.join(self.full_filename, *parts[: index + 1]) for index in range(len(parts))
+        ]
+        object_ids = [self._com.get_path_id(path) for path in paths]
+        if None in object_ids:
+            return None
+        parent_id = getattr(self._object_id, "value", self._object_id)
+        cont: Optional["PortableDeviceContent"] = None
+        for path, object_id in zip(paths, object_ids):
+            try:
+                cont = PortableDeviceContent(
+                    object_id, self._com, os.path.dirname(path), minimal=True
+                )
+            except comtypes.COMError:
+                cont = None
+            if cont is None or cont.full_filename != path or cont._parent_id != parent_id:
+                self._com.forget_path(path)
+                return None
+            parent_id = object_id
+        return cont
+
     def __repr__(self) -> str:
         """ """
         return f"<PortableDeviceContent {self._object_id}: {self.get_properties()}>"
 
-    def create_content(self, dirname: str) -> None:
+    def create_content(self, dirname: str) -> Optional["PortableDeviceContent"]:
         """Creates an empty directory content in this content.
 
         Args:
             dirname: Name of the directory that shall be created
 
+        Returns:
+            The PortableDeviceContent of the new directory or None if it could not be found
+            after creating it.
+
         Examples:
             >>> import mtp.win_access
             >>> dev = mtp.win_access.get_portable_devices()
@@ -447,21 +952,26 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> mycont = cont.get_path("Interner Speicher\\Music\\MyMusic")
             >>> if mycont: _ = mycont.remove()
             >>> cont = cont.get_path("Interner Speicher\\Music")
-            >>> cont.create_content("MyMusic")
+            >>> str(cont.create_content("MyMusic"))[:22]
+            '<PortableDeviceContent'
         """
         try:
-            object_properties = comtypes.client.CreateObject(
-                types.PortableDeviceValues,  # pylint: disable=no-member # type: ignore
-                clsctx=comtypes.CLSCTX_INPROC_SERVER,
-                interface=port.IPortableDeviceValues,  # pylint: disable=no-member # type: ignore
-            )
-            object_properties.SetStringValue(WPD_OBJECT_PARENT_ID, self._object_id)  # type: ignore
-            object_properties.SetStringValue(WPD_OBJECT_NAME, dirname)  # type: ignore
-            object_properties.SetStringValue(WPD_OBJECT_ORIGINAL_FILE_NAME, dirname)  # type: ignore
-            object_properties.SetGuidValue(WPD_OBJECT_CONTENT_TYPE, WPD_CONTENT_TYPE_FOLDER_GUID)  # type: ignore
-            self._content.CreateObjectWithPropertiesOnly(  # type: ignore
-                object_properties, ctypes.POINTER(ctypes.c_wchar_p)()
-            )
+            with _borrow_values() as object_properties:
+                object_properties.SetStringValue(WPD_OBJECT_PARENT_ID, self._object_id)  # type: ignore
+                object_properties.SetStringValue(WPD_OBJECT_NAME, dirname)  # type: ignore
+                object_properties.SetStringValue(WPD_OBJECT_ORIGINAL_FILE_NAME, dirname)  # type: ignore
+                object_properties.SetGuidValue(WPD_OBJECT_CONTENT_TYPE, WPD_CONTENT_TYPE_FOLDER_GUID)  # type: ignore
+                self._com.forget_path(os.path.join(self.full_filename, dirname))
+                new_object_id = ctypes.c_wchar_p()
+                self._com.content.CreateObjectWithPropertiesOnly(  # type: ignore
+                    object_properties, ctypes.pointer(new_object_id)
+                )
+            if not new_object_id.value:
+                # The driver didn't return the id, so search the new directory
+                return self.get_child(dirname)
+            object_id = new_object_id.value
+            _CoTaskMemFree(new_object_id)
+            return PortableDeviceContent(object_id, self._com, self.full_filename)
         except comtypes.COMError as err:
             raise IOError(f"Error creating directory '{dirname}': {err.args[1]}")
 
@@ -488,53 +998,54 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> inp.close()
         """
         try:
-            object_properties = comtypes.client.CreateObject(
-                types.PortableDeviceValues,  # pylint: disable=no-member # type: ignore
-                clsctx=comtypes.CLSCTX_INPROC_SERVER,
-                interface=port.IPortableDeviceValues,  # pylint: disable=no-member # type: ignore
-            )
-            object_properties.SetStringValue(WPD_OBJECT_PARENT_ID, self._object_id)  # type: ignore
-            object_properties.SetUnsignedLargeIntegerValue(WPD_OBJECT_SIZE, stream_len)  # type: ignore
-            object_properties.SetStringValue(WPD_OBJECT_ORIGINAL_FILE_NAME, filename)  # type: ignore
-            object_properties.SetStringValue(WPD_OBJECT_NAME, filename)  # type: ignore
-            optimal_transfer_size_bytes = ctypes.pointer(ctypes.c_ulong(0))
-            p_filestream = ctypes.POINTER(port.IStream)()  # pylint: disable=no-member # type: ignore
-            # be sure to change the IPortableDeviceContent
-            # 'CreateObjectWithPropertiesAndData' function in the generated code to
-            # have IStream ppData as 'in','out'
-            filestream, _, _ = self._content.CreateObjectWithPropertiesAndData(  # type: ignore
-                object_properties,
-                p_filestream,
-                optimal_transfer_size_bytes,
-                ctypes.POINTER(ctypes.c_wchar_p)(),
-            )
-            # filestream = filestream.value
-            blocksize = optimal_transfer_size_bytes.contents.value
-            # cur_written = 0
-            # while True:
-            #     to_read = stream_len - cur_written
-            #     block = inputstream.read(to_read if to_read < blocksize else blocksize)
-            #     if len(block) <= 0:
-            #         break
-            #     string_buf = ctypes.create_string_buffer(block)
-            #     written = filestream.RemoteWrite(
-            #         ctypes.cast(string_buf, ctypes.POINTER(ctypes.c_ubyte)),
-            #         len(block),
-            #     )
-            #     cur_written += written
-            #     if cur_written >= stream_len:
-            #         break
-            while True:
-                block = inputstream.read(blocksize)
-                if len(block) <= 0:
-                    break
-                string_buf = ctypes.create_string_buffer(block)
-                filestream.RemoteWrite(  # type: ignore
-                    ctypes.cast(string_buf, ctypes.POINTER(ctypes.c_ubyte)),
-                    len(block),
+            # The properties are only given back after Commit, the driver uses them up to then
+            with _borrow_values() as object_properties:
+                object_properties.SetStringValue(WPD_OBJECT_PARENT_ID, self._object_id)  # type: ignore
+                object_properties.SetUnsignedLargeIntegerValue(WPD_OBJECT_SIZE, stream_len)  # type: ignore
+                object_properties.SetStringValue(WPD_OBJECT_ORIGINAL_FILE_NAME, filename)  # type: ignore
+                object_properties.SetStringValue(WPD_OBJECT_NAME, filename)  # type: ignore
+                optimal_transfer_size_bytes = ctypes.pointer(ctypes.c_ulong(0))
+                p_filestream = _ISTREAM_P()
+                # be sure to change the IPortableDeviceContent
+                # 'CreateObjectWithPropertiesAndData' function in the generated code to
+                # have IStream ppData as 'in','out'
+                filestream, _, _ = self._com.content.CreateObjectWithPropertiesAndData(  # type: ignore
+                    object_properties,
+                    p_filestream,
+                    optimal_transfer_size_bytes,
+                    _WCHAR_P_P(),
                 )
-            stgc_default = 0
-            filestream.Commit(stgc_default)  # type: ignore
+                # filestream = filestream.value
+                blocksize = max(optimal_transfer_size_bytes.contents.value, MIN_TRANSFER_SIZE)
+                # cur_written = 0
+                # while True:
+                #     to_read = stream_len - cur_written
+                #     block = inputstream.read(to_read if to_read < blocksize else blocksize)
+                #     if len(block) <= 0:
+                #         break
+                #     string_buf = ctypes.create_string_buffer(block)
+                #     written = filestream.RemoteWrite(
+                #         ctypes.cast(string_buf, ctypes.POINTER(ctypes.c_ubyte)),
+                #         len(block),
+                #     )
+                #     cur_written += written
+                #     if cur_written >= stream_len:
+                #         break
+                # Two buffers for the whole transfer: while one is written to the device, the next
+                # block of the file is read into the other one in a thread. The COM calls stay in
+                # this thread.
+                buffers = [(ctypes.c_ubyte * blocksize)() for _ in range(2)]
+                buf_views = [memoryview(buf).cast("B") for buf in buffers]
+                buf_ptrs = [ctypes.cast(buf, _UBYTE_P) for buf in buffers]
+                with ThreadPoolExecutor(max_workers=1) as reader:
+                    index = 0
+                    pending = reader.submit(inputstream.readinto, buf_views[index])
+                    while length := pending.result():
+                        pending = reader.submit(inputstream.readinto, buf_views[1 - index])
+                        filestream.RemoteWrite(buf_ptrs[index], length)  # type: ignore
+                        index = 1 - index
+                stgc_default = 0
+                filestream.Commit(stgc_default)  # type: ignore
         except comtypes.COMError as err:
             raise IOError(f"Error storing stream '{filename}': {err.args[1]}")
 
@@ -582,10 +1093,10 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> outp.close()
         """
         try:
-            resources = self._content.Transfer()  # type: ignore
+            resources = self._com.get_resources()
             stgm_read = ctypes.c_uint(0)
             optimal_transfer_size_bytes = ctypes.pointer(ctypes.c_ulong(0))
-            p_filestream = ctypes.POINTER(port.IStream)()  # pylint: disable=no-member # type: ignore
+            p_filestream = _ISTREAM_P()
             optimal_transfer_size_bytes, q_filestream = resources.GetStream(  # type: ignore
                 self._object_id,
                 WPD_RESOURCE_DEFAULT,
@@ -593,15 +1104,22 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
                 optimal_transfer_size_bytes,
                 p_filestream,
             )
-            blocksize = int(optimal_transfer_size_bytes.contents.value)  # type: ignore
+            blocksize = max(int(optimal_transfer_size_bytes.contents.value), MIN_TRANSFER_SIZE)  # type: ignore
             filestream = q_filestream.value  # type: ignore
             #            buf = (ctypes.c_ubyte * blocksize)()
             # make sure all RemoteRead parameters are in
-            while True:
-                buf, length = filestream.RemoteRead(blocksize)  # type: ignore
-                if length == 0:
-                    break
-                outputstream.write(bytearray(buf[:length]))  # type: ignore
+            # The blocks are written to outputstream in a thread while the next one is read
+            # from the device.
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                pending: Optional[Future[int]] = None
+                while True:
+                    buf, length = filestream.RemoteRead(blocksize)  # type: ignore
+                    if pending is not None:
+                        pending.result()
+                    if length == 0:
+                        break
+                    # A view on the array RemoteRead returned, so the data isn't copied again
+                    pending = writer.submit(outputstream.write, memoryview(buf).cast("B")[:length])  # type: ignore
         except comtypes.COMError as err:
             raise IOError(f"Error getting file': {err.args[1]}")
 
@@ -648,32 +1166,49 @@ class PortableDeviceContent:  # pylint: disable=too-many-instance-attributes
             >>> mycont.remove()
             0
         """
+        PortableDeviceContent.remove_many([self])
+
+    @staticmethod
+    def remove_many(contents: Collection["PortableDeviceContent"]) -> None:
+        """Deletes several directories or files of one device with a single request.
+
+        Args:
+            contents: The PortableDeviceContent instances to delete. All must belong to the
+                        same device.
+
+        Examples:
+            >>> import mtp.win_access
+            >>> dev = mtp.win_access.get_portable_devices()
+            >>> cont = dev[0].get_content()[0].get_path("Interner Speicher\\Music")
+            >>> mtp.win_access.PortableDeviceContent.remove_many(list(cont.get_children()))
+        """
+        if not contents:
+            return
+        device_com = next(iter(contents))._com  # pylint: disable=protected-access
+        failed: list[str] = []
         try:
-            objects_to_delete = comtypes.client.CreateObject(
-                types.PortableDevicePropVariantCollection,  # pylint: disable=no-member, protected-access # type: ignore
-                clsctx=comtypes.CLSCTX_INPROC_SERVER,  # pylint: disable=no-member, protected-access
-                interface=port.IPortableDevicePropVariantCollection,  # pylint: disable=no-member, protected-access # type: ignore
-            )
-            pvar = port.tag_inner_PROPVARIANT()  # pylint: disable=no-member # type: ignore
-            pvar.vt = comtypes.automation.VT_LPWSTR
-            pvar.data.pwszVal = ctypes.c_wchar_p(self._object_id)
-            objects_to_delete.Add(pvar)  # type: ignore
-            errors = comtypes.client.CreateObject(
-                types.PortableDevicePropVariantCollection,  # pylint: disable=no-member, protected-access # type: ignore
-                clsctx=comtypes.CLSCTX_INPROC_SERVER,  # pylint: disable=no-member, protected-access
-                interface=port.IPortableDevicePropVariantCollection,  # pylint: disable=no-member, protected-access # type: ignore
-            )
-            self._content.Delete(WPD_DELETE_WITH_RECURSION, objects_to_delete, errors)  # type: ignore
-            count = ctypes.c_ulong()
-            errors.GetCount(ctypes.pointer(count))  # type: ignore
-            for i in range(count.value):
-                index = ctypes.c_ulong(i)
+            with _borrow_prop_variants() as objects_to_delete, _borrow_prop_variants() as errors:
+                for cont in contents:
+                    _add_object_id(
+                        objects_to_delete, cont._object_id  # pylint: disable=protected-access
+                    )
+                    device_com.forget_path(cont.full_filename)
+                device_com.content.Delete(WPD_DELETE_WITH_RECURSION, objects_to_delete, errors)  # type: ignore
+                # errors holds one HRESULT per object in the order of objects_to_delete
+                count = ctypes.c_ulong()
+                errors.GetCount(ctypes.pointer(count))  # type: ignore
                 pvar = port.tag_inner_PROPVARIANT()  # pylint: disable=no-member # type: ignore
-                errors.GetAt(index, ctypes.pointer(pvar))  # type: ignore
-                # if pvar.data.uintVal != 0:
-                #     return pvar.data.uintVal
+                pvar_ptr = ctypes.pointer(pvar)
+                for index, cont in zip(range(count.value), contents):
+                    errors.GetAt(index, pvar_ptr)  # type: ignore
+                    if pvar.data.uintVal != 0:
+                        failed.append(cont.full_filename)
         except comtypes.COMError as err:
-            raise IOError(f"Error deleting file '{self.full_filename}': {err.args[1]}")
+            names = "', '".join(cont.full_filename for cont in contents)
+            raise IOError(f"Error deleting '{names}': {err.args[1]}")
+        if failed:
+            names = "', '".join(failed)
+            raise IOError(f"Error deleting '{names}'")
 
 
 # -------------------------------------------------------------------------------------------------
@@ -687,6 +1222,8 @@ class PortableDevice:
     Public methods:
         get_description
         get_content
+        load
+        close
 
     Public attributes:
 
@@ -703,7 +1240,11 @@ class PortableDevice:
         self._p_id = p_id
         self._desc = ""
         self._name = ""
+        # True once name and description are read, they may be empty
+        self._description_read = False
         self._device = None
+        self._com: Optional[_DeviceCOM] = None
+        self._root: Optional[PortableDeviceContent] = None
 
     def get_description(self) -> Tuple[str, str]:
         """Get the name and the description of the device. If no description is available
@@ -718,55 +1259,70 @@ class PortableDevice:
             >>> dev[0].get_description()
             ('HSG1316', 'HSG1316')
         """
-        if self._name:
+        if self._description_read:
             return self._name, self._desc
         if DEVICE_MANAGER is None:
             return "", ""
-        name_len = ctypes.pointer(ctypes.c_ulong(0))
-        DEVICE_MANAGER.GetDeviceDescription(self._p_id, ctypes.POINTER(ctypes.c_ushort)(), name_len)
-        name = ctypes.create_unicode_buffer(name_len.contents.value)
-        DEVICE_MANAGER.GetDeviceDescription(
-            self._p_id,
-            ctypes.cast(name, ctypes.POINTER(ctypes.c_ushort)),
-            name_len,
-        )
-        self._desc = name.value
-        try:
-            DEVICE_MANAGER.GetDeviceFriendlyName(self._p_id, ctypes.POINTER(ctypes.c_ushort)(), name_len)
-            name = ctypes.create_unicode_buffer(name_len.contents.value)
-            DEVICE_MANAGER.GetDeviceFriendlyName(
-                self._p_id,
-                ctypes.cast(name, ctypes.POINTER(ctypes.c_ushort)),
-                name_len,
-            )
-            self._name = name.value
-        except comtypes.COMError:
+        self._desc = _read_device_string(DEVICE_MANAGER.GetDeviceDescription, self._p_id)
+        if self._p_id not in _NO_FRIENDLY_NAME:
+            try:
+                self._name = _read_device_string(DEVICE_MANAGER.GetDeviceFriendlyName, self._p_id)
+            except comtypes.COMError:
+                _NO_FRIENDLY_NAME.add(self._p_id)
+        if self._p_id in _NO_FRIENDLY_NAME:
             self._name = self._desc
             try:
-                propvalues = self._get_device().Content().properties().GetValues("DEVICE", None)
+                propvalues = (
+                    self._get_device()
+                    .Content()
+                    .properties()
+                    .GetValues("DEVICE", _properties_to_read(minimal=True))
+                )
                 self._name = propvalues.GetStringValue(WPD_OBJECT_NAME)
             except comtypes.COMError:
                 self._name = self._desc
         # WPD_DEVICE_SERIAL_NUMBER
+        self._description_read = True
         return self._name, self._desc
 
     def _get_device(self) -> Any:
         """Open a device"""
         if self._device:
             return self._device
+        self._device = self._open_device()
+        return self._device
+
+    def _open_device(self) -> Any:
+        """Opens a new connection to the device"""
         client_information = comtypes.client.CreateObject(
             types.PortableDeviceValues,  # pylint: disable=no-member  # type: ignore
             clsctx=comtypes.CLSCTX_INPROC_SERVER,
             interface=port.IPortableDeviceValues,  # pylint: disable=no-member  # type: ignore
         )
-        self._device = comtypes.client.CreateObject(
+        device = comtypes.client.CreateObject(
             port.PortableDevice,  # pylint: disable=no-member  # type: ignore
             clsctx=comtypes.CLSCTX_INPROC_SERVER,
             interface=port.IPortableDevice,  # pylint: disable=no-member  # type: ignore
         )
-        if self._device is not None:  # type: ignore
-            self._device.Open(self._p_id, client_information)  # type: ignore
-        return self._device
+        if device is not None:  # type: ignore
+            device.Open(self._p_id, client_information)  # type: ignore
+        return device
+
+    def _open_com(self) -> _DeviceCOM:
+        """Opens a new connection to the device for the current thread"""
+        return _DeviceCOM(self._open_device().Content())
+
+    def _thread_root(self) -> Optional[PortableDeviceContent]:
+        """Returns the root of the connection opened by init_thread in the calling thread or None"""
+        return getattr(_thread_roots, "roots", {}).get(self._p_id)
+
+    def _get_com(self) -> _DeviceCOM:
+        """Returns the COM interfaces the calling thread has to use for the device"""
+        if (root := self._thread_root()) is not None:
+            return root._com  # pylint: disable=protected-access
+        if self._com is None:
+            self._com = _DeviceCOM(self._get_device().Content(), self._open_com)
+        return self._com
 
     def get_device_path(self) -> str:
         """Returns the full path to the directory"""
@@ -784,18 +1340,237 @@ class PortableDevice:
             >>> str(dev[0].get_content())[:33]
             '<PortableDeviceContent c_wchar_p('
         """
+        # A thread prepared with init_thread uses its own connection
+        if (root := self._thread_root()) is None:
+            if self._root is None:
+                self._root = PortableDeviceContent(ctypes.c_wchar_p("DEVICE"), self._get_com())
+            root = self._root
+        # The root is read once, callers get a copy they may change
         return [
-            PortableDeviceContent(ctypes.c_wchar_p("DEVICE"), self._get_device().Content(), None),
+            copy.copy(root),
         ]
 
+    def load(self) -> None:
+        """Reads name and description of the device now. Otherwise they are read on first use,
+        so listing the devices doesn't talk to them.
+
+        Examples:
+            >>> import mtp.win_access
+            >>> dev = mtp.win_access.get_portable_devices()
+            >>> dev[0].load()
+            >>> dev[0]
+            <PortableDevice: ('HSG1316', 'HSG1316')>
+        """
+        self.get_description()
+
+    def close(self) -> None:
+        """Stops the background thread of the device and closes the connection to it.
+        Contents read before can't be used anymore, a later call of get_content opens
+        a new connection.
+
+        Examples:
+            >>> import mtp.win_access
+            >>> dev = mtp.win_access.get_portable_devices()
+            >>> dev[0].close()
+        """
+        if self._com is not None:
+            self._com.close()
+            self._com = None
+        self._root = None
+        if self._device is not None:
+            with contextlib.suppress(comtypes.COMError):
+                self._device.Close()  # type: ignore
+            self._device = None
+
+    def __del__(self) -> None:
+        # Only the thread is stopped, the COM objects are released by their own destructors
+        if getattr(self, "_com", None) is not None:
+            self._com.close()  # type: ignore
+
     def __repr__(self) -> str:
-        return f"<PortableDevice: {self.get_description()}>"
+        if not self._description_read:
+            return f"<PortableDevice id={self._p_id}>"
+        return f"<PortableDevice: {(self._name, self._desc)}>"
+
+
+# -------------------------------------------------------------------------------------------------
+def _read_device_string(method: Callable[..., Any], p_id: str) -> str:
+    """Reads a string of the device manager, e.g. with GetDeviceDescription. The first call
+    returns the length, the second one fills a buffer of that length."""
+    # The length is an [in, out] parameter, comtypes needs a real pointer for it, not byref
+    length = ctypes.pointer(ctypes.c_ulong(0))
+    method(p_id, _USHORT_P(), length)
+    text = ctypes.create_unicode_buffer(length.contents.value)
+    method(p_id, (ctypes.c_ushort * length.contents.value).from_buffer(text), length)
+    return text.value
+
+
+# -------------------------------------------------------------------------------------------------
+# Threads of walk and of the enumeration. The COM objects of the caller can't be used in another
+# thread, so each thread initialises COM and opens its own connection to the device.
+
+_walk_worker = threading.local()
+_enum_worker = threading.local()
+
+
+def _init_walk_worker(dev: PortableDevice) -> None:
+    """Initializer of the walk threads"""
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)  # type: ignore
+    _walk_worker.com = dev._open_com()  # pylint: disable=protected-access
+
+
+def _init_enum_thread(connection_opener: "weakref.WeakMethod[Callable[[], _DeviceCOM]]") -> None:
+    """Initializer of the enumeration thread of a device. Some drivers reject the
+    multithreaded apartment, then the thread uses a single threaded one."""
+    _enum_worker.com = None
+    if (open_connection := connection_opener()) is None:
+        # The device was deleted meanwhile
+        return
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)  # type: ignore
+    try:
+        _enum_worker.com = open_connection()
+    except comtypes.COMError:
+        comtypes.CoUninitialize()  # type: ignore
+        comtypes.CoInitializeEx(comtypes.COINIT_APARTMENTTHREADED)  # type: ignore
+        with contextlib.suppress(comtypes.COMError):
+            _enum_worker.com = open_connection()
+
+
+def _close_enum_thread() -> None:
+    """Releases the connection of the enumeration thread, the last task of the thread"""
+    _enum_worker.com = None
+
+
+def _produce_object_ids(parent_id: Any, batches: queue.Queue[Any], cancel: threading.Event) -> None:
+    """Puts the object id batches of the children of parent_id into batches, followed by None.
+    Runs in the enumeration thread and stops early when cancel is set."""
+    if _enum_worker.com is None:
+        raise BrokenExecutor("The enumeration thread has no connection to the device")
+    for object_ids in _enum_object_ids(_enum_worker.com.content, parent_id):
+        if cancel.is_set():
+            return
+        batches.put(object_ids)
+    batches.put(None)
+
+
+def _list_children(cont: PortableDeviceContent) -> list[PortableDeviceContent]:
+    """Lists the children of cont through the device connection of the current walk thread.
+    The children only hold python values, their COM interfaces must be set back by the caller."""
+    worker_cont = copy.copy(cont)
+    worker_cont._com = _walk_worker.com  # pylint: disable=protected-access
+    return list(worker_cont.get_children())
+
+
+def _walk_key(cont: PortableDeviceContent) -> str:
+    """Returns the object id of cont as key for the prefetched listings of walk. Unlike the
+    full filename it is unique, even if a directory holds several objects with the same name."""
+    return getattr(cont._object_id, "value", cont._object_id)  # pylint: disable=protected-access
 
 
 # -------------------------------------------------------------------------------------------------
 # Globale functions
 
 
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def _split_path(path: str) -> Tuple[str, ...]:
+    """Splits a path with \\ or / as separator into its non empty parts"""
+    return tuple(part for part in path.translate(_PATH_NORM).split(_SEP) if part)
+
+
+def set_com_init_mode(mode: str) -> None:
+    """Sets how COM is initialized in the threads that call get_portable_devices.
+
+    Args:
+        mode: "auto" initializes a single threaded apartment (the default),
+                "mta" initializes the multithreaded apartment,
+                "caller" doesn't initialize COM, the application has already done it.
+                Importing comtypes makes the importing thread a single threaded apartment.
+                With "mta" that thread stays one, unless sys.coinit_flags is set to
+                COINIT_MULTITHREADED (0) before comtypes is imported.
+
+    Exceptions:
+        ValueError: If mode is unknown
+
+    Examples:
+        >>> import mtp.win_access
+        >>> mtp.win_access.set_com_init_mode("caller")
+    """
+    global _com_init_mode  # pylint: disable=global-statement
+
+    if mode not in _COM_INIT_MODES:
+        raise ValueError(f"Unknown COM init mode '{mode}', use one of {_COM_INIT_MODES}")
+    _com_init_mode = mode
+
+
+def init_thread(dev: PortableDevice) -> None:
+    """Prepares a thread of the application for reading dev. COM objects can only be used in
+    the thread that created them, so the thread initializes COM and opens its own connection to
+    the device, like the threads of walk do. From then on dev.get_content and
+    get_content_from_device_path return contents using that connection in this thread.
+    Contents read in another thread are moved in and out with bind_to_thread.
+
+    Args:
+        dev: The device the thread will read
+
+    Exceptions:
+        IOError: If the device can't be opened
+
+    Examples:
+        >>> import concurrent.futures, mtp.win_access
+        >>> dev = mtp.win_access.get_portable_devices()[0]
+        >>> pool = concurrent.futures.ThreadPoolExecutor(
+        ...     initializer=mtp.win_access.init_thread, initargs=(dev,)
+        ... )
+    """
+    _co_initialize_mta()
+    if (roots := getattr(_thread_roots, "roots", None)) is None:
+        roots = _thread_roots.roots = {}
+    try:
+        roots[dev._p_id] = PortableDeviceContent(  # pylint: disable=protected-access
+            ctypes.c_wchar_p("DEVICE"), dev._open_com()  # pylint: disable=protected-access
+        )
+    except comtypes.COMError as err:
+        raise IOError(f"Error opening the device for this thread: {err.args[1]}")
+
+
+def bind_to_thread(dev: PortableDevice, content: PortableDeviceContent) -> PortableDeviceContent:
+    """Returns a copy of content, that was read in another thread, for use in the calling thread.
+    The copy uses the connection opened by init_thread or, in any other thread, the one of dev.
+
+    Args:
+        dev: The device content belongs to
+        content: The content to move
+
+    Returns:
+        The copy of content
+    """
+    bound = copy.copy(content)
+    bound._com = dev._get_com()  # pylint: disable=protected-access
+    return bound
+
+
+def _co_initialize_mta() -> None:
+    """Initializes the multithreaded apartment in the calling thread. A thread that already is a
+    single threaded apartment, like the one that imported comtypes, stays one. COM works there
+    as well, so that isn't an error."""
+    try:
+        comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)  # type: ignore
+    except OSError as err:
+        if (getattr(err, "winerror", None) or 0) & 0xFFFFFFFF != _RPC_E_CHANGED_MODE:
+            raise
+
+
+def _init_com() -> None:
+    """Initializes COM once per thread as set with set_com_init_mode"""
+    if _com_init_mode == "caller" or getattr(_com_initialized, "done", False):
+        return
+    if _com_init_mode == "mta":
+        _co_initialize_mta()
+    else:
+        comtypes.CoInitialize()  # type: ignore
+    _com_initialized.done = True
+
+
 def get_portable_devices() -> list[PortableDevice]:
     """Get all attached portable devices.
 
@@ -808,39 +1583,56 @@ def get_portable_devices() -> list[PortableDevice]:
 
     Examples:
         >>> import mtp.win_access
-        >>> mtp.win_access.get_portable_devices()
-        [<PortableDevice: ('HSG1316', 'HSG1316')>]
+        >>> [dev.get_description() for dev in mtp.win_access.get_portable_devices()]
+        [('HSG1316', 'HSG1316')]
     """
     global DEVICE_MANAGER  # pylint: disable=global-statement
 
     try:
+        _init_com()
         if DEVICE_MANAGER is None:
-            comtypes.CoInitialize()
             DEVICE_MANAGER = comtypes.client.CreateObject(  # type: ignore
                 port.PortableDeviceManager,  # pylint: disable=no-member  # type: ignore
                 clsctx=comtypes.CLSCTX_INPROC_SERVER,
                 interface=port.IPortableDeviceManager,  # pylint: disable=no-member  # type: ignore
             )
-        pnp_device_id_count = ctypes.pointer(ctypes.c_ulong(0))
-        DEVICE_MANAGER.GetDevices(ctypes.POINTER(ctypes.c_wchar_p)(), pnp_device_id_count)
-        if pnp_device_id_count.contents.value == 0:
-            return []
-        pnp_device_ids = (ctypes.c_wchar_p * pnp_device_id_count.contents.value)()
-        DEVICE_MANAGER.GetDevices(  # pylint: disable=no-member  # type: ignore
-            ctypes.cast(pnp_device_ids, ctypes.POINTER(ctypes.c_wchar_p)),
-            pnp_device_id_count,
-        )
-        return [PortableDevice(cur_id) for cur_id in pnp_device_ids if cur_id is not None]
+        # Normally the buffer is large enough and one call is sufficient. If it is filled
+        # completely, there may be more devices, then we ask for the number and try again.
+        capacity = DEVICE_ID_SLOTS
+        while True:
+            pnp_device_ids = (ctypes.c_wchar_p * capacity)()
+            # [in, out] parameter, so a real pointer and not byref, see _read_device_string
+            pnp_device_id_count = ctypes.pointer(ctypes.c_ulong(capacity))
+            DEVICE_MANAGER.GetDevices(  # pylint: disable=no-member  # type: ignore
+                ctypes.cast(pnp_device_ids, _WCHAR_P_P),
+                pnp_device_id_count,
+            )
+            # Copy the ids in one slice, then free the strings the device manager allocated
+            count = min(pnp_device_id_count.contents.value, capacity)
+            device_ids: List[Optional[str]] = pnp_device_ids[:count]  # type: ignore
+            for address in (ctypes.c_void_p * count).from_buffer(pnp_device_ids):
+                if address:
+                    _CoTaskMemFree(address)
+            if pnp_device_id_count.contents.value < capacity:
+                break
+            DEVICE_MANAGER.GetDevices(_WCHAR_P_P(), pnp_device_id_count)
+            if pnp_device_id_count.contents.value < capacity:
+                break
+            capacity = pnp_device_id_count.contents.value + 1
+        return [PortableDevice(cur_id) for cur_id in device_ids if cur_id is not None]
     except comtypes.COMError as err:
         raise IOError(f"Error getting list of devices: {err.args[1]}")
 
 
-def get_content_from_device_path(dev: PortableDevice, path: str) -> Optional[PortableDeviceContent]:
+def get_content_from_device_path(
+    dev: PortableDevice, path: str, device_name: Optional[str] = None
+) -> Optional[PortableDeviceContent]:
     """Get the content of a path.
 
     Args:
         dev: The instance of PortableDevice where the path is searched
         path: The pathname of the file or directory
+        device_name: The name of dev if the caller already knows it
 
     Returns:
         An instance of PortableDeviceContent if the path is an existing file or directory
@@ -858,11 +1650,13 @@ def get_content_from_device_path(dev: PortableDevice, path: str) -> Optional[Por
         "<PortableDeviceContent o3: ('Ringtones', 1, -1"
     """
     try:
-        path = path.replace("\\", os.path.sep).replace("/", os.path.sep)
-        path_parts = path.split(os.path.sep)
-        if path_parts[0] == dev.get_description()[0]:
+        if not (path_parts := _split_path(path)):
+            return None
+        if device_name is None:
+            device_name = dev.get_description()[0]
+        if path_parts[0] == device_name:
             return (
-                dev.get_content()[0].get_path(os.path.sep.join(path_parts[1:]))
+                dev.get_content()[0].get_path(_SEP.join(path_parts[1:]))
                 if len(path_parts) > 1
                 else dev.get_content()[0]
             )
@@ -915,41 +1709,68 @@ def walk(
         hangouts_message.ogg
         hangouts_incoming_call.ogg
     """
-    if not (cont := get_content_from_device_path(dev, path)):
+    device_name = dev.get_description()[0]
+    if _split_path(path) == (device_name,):
+        # The device itself, there is no path to resolve
+        cont = dev.get_content()[0]
+    elif not (cont := get_content_from_device_path(dev, path, device_name)):
         return
     cont.full_filename = path
-    walk_cont: list[PortableDeviceContent] = [cont]
-    while walk_cont:
-        cont = walk_cont[0]
-        del walk_cont[0]
-        directories: list[PortableDeviceContent] = []
-        files: list[PortableDeviceContent] = []
-        try:
-            for child in cont.get_children():
-                (_, contenttype, _, _, _, _, _) = child.get_properties()
-                if contenttype in [
-                    WPD_CONTENT_TYPE_STORAGE,
-                    WPD_CONTENT_TYPE_DIRECTORY,
-                ]:
-                    # child.full_filename = os.path.join(cont.full_filename, name)
-                    directories.append(child)
-                elif contenttype == WPD_CONTENT_TYPE_FILE:
-                    # child.full_filename = os.path.join(cont.full_filename, name)
-                    files.append(child)
-                if callback and not callback(child.full_filename):
-                    directories = []
-                    files = []
-                    return
-            yield cont.full_filename, sorted(directories, key=lambda ent: ent.full_filename), sorted(
-                files, key=lambda ent: ent.full_filename
-            )
-        except Exception as err:
-            if error_callback is not None:
-                if not error_callback(str(err)):
-                    directories = []
-                    files = []
-                    return
-        walk_cont.extend(directories)
+    walk_cont: deque[PortableDeviceContent] = deque([cont])
+    # The next directories in the queue are listed in the background over an own device
+    # connection, so the round trips overlap with the work of the caller. Results are used in
+    # queue order. If a thread fails for any reason, the directory is listed here again.
+    pool = ThreadPoolExecutor(
+        max_workers=WALK_THREADS, initializer=_init_walk_worker, initargs=(dev,)
+    )
+    # Keyed by object id, see _walk_key
+    prefetched: dict[str, Future[list[PortableDeviceContent]]] = {}
+    prefetch = WALK_PREFETCH
+    sort_key = attrgetter("full_filename")
+    try:
+        while walk_cont:
+            cont = walk_cont.popleft()
+            for queued in islice(walk_cont, prefetch):
+                if _walk_key(queued) not in prefetched:
+                    try:
+                        prefetched[_walk_key(queued)] = pool.submit(_list_children, queued)
+                    except BrokenExecutor:
+                        # The threads couldn't open the device, list everything here
+                        prefetch = 0
+                        break
+            directories: list[PortableDeviceContent] = []
+            files: list[PortableDeviceContent] = []
+            try:
+                children: Optional[list[PortableDeviceContent]] = None
+                if (future := prefetched.pop(_walk_key(cont), None)) is not None:
+                    with contextlib.suppress(Exception):
+                        children = future.result()
+                        for child in children:
+                            child._com = cont._com  # pylint: disable=protected-access
+                for child in children if children is not None else cont.get_children():
+                    contenttype, _ = child.get_type_and_name()
+                    if contenttype in _DIR_TYPES:
+                        directories.append(child)
+                    elif contenttype == WPD_CONTENT_TYPE_FILE:
+                        files.append(child)
+                    if callback and not callback(child.full_filename):
+                        directories = []
+                        files = []
+                        return
+                yield (
+                    cont.full_filename,
+                    sorted(directories, key=sort_key),
+                    sorted(files, key=sort_key),
+                )
+            except Exception as err:
+                if error_callback is not None:
+                    if not error_callback(str(err)):
+                        directories = []
+                        files = []
+                        return
+            walk_cont.extend(directories)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def makedirs(dev: PortableDevice, path: str) -> Optional[PortableDeviceContent]:
@@ -971,18 +1792,20 @@ def makedirs(dev: PortableDevice, path: str) -> Optional[PortableDeviceContent]:
     """
     try:
         path_int = ""
+        device_name = dev.get_description()[0]
         content: Optional[PortableDeviceContent] = dev.get_content()[0]
-        path = path.replace("\\", os.path.sep).replace("/", os.path.sep)
-        for dirname in path.split(os.path.sep):
-            if dirname == "":
-                continue
+        # Once a directory is created, there is nothing below it to search
+        created = False
+        for dirname in _split_path(path):
             path_int = os.path.join(path_int, dirname)
-            ziel_content = get_content_from_device_path(dev, path_int)
+            ziel_content = (
+                None if created else get_content_from_device_path(dev, path_int, device_name)
+            )
             if not ziel_content:
                 if not content:
                     return None
-                content.create_content(dirname)
-                ziel_content = get_content_from_device_path(dev, path_int)
+                ziel_content = content.create_content(dirname)
+                created = True
             content = ziel_content
         return content
     except comtypes.COMError as err: